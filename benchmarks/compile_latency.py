@@ -0,0 +1,93 @@
+# coding: utf8
+"""Compare per-line compile latency of `go run`, `go build` and the direct
+compile/link path used by the "direct" backend.
+
+Every iteration compiles a program that has never been built before, so
+neither gonsole's build cache nor the go command's link cache can help.
+
+    python benchmarks/compile_latency.py [iterations]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gonsole.const import GO_TEMPLATE  # noqa: E402
+from gonsole.toolchain import Toolchain, DirectBuilder  # noqa: E402
+
+
+def program(index):
+    return GO_TEMPLATE.replace(
+        "{%import_area%}", '    "fmt"\n    "strings"'
+    ).replace(
+        "{%func_area%}", ""
+    ).replace(
+        "{%code_area%}",
+        '    fmt.Println(strings.ToUpper("x"), {0})'.format(index)
+    )
+
+
+def measure(name, run, iterations, work_dir):
+    timings = []
+    for index in range(iterations):
+        source_path = os.path.join(work_dir, "main.go")
+        with open(source_path, "w") as f:
+            f.write(program(time.time_ns() + index))
+        start = time.perf_counter()
+        run(source_path, os.path.join(work_dir, "main"))
+        timings.append((time.perf_counter() - start) * 1000)
+    return name, statistics.median(timings), min(timings), max(timings)
+
+
+def go_run(source_path, output_path):
+    subprocess.check_output(["go", "run", source_path])
+
+
+def go_build(source_path, output_path):
+    Toolchain.instance().build(source_path, output_path)
+    subprocess.check_output([output_path])
+
+
+def direct(builder):
+    def run(source_path, output_path):
+        builder.build(source_path, output_path)
+        subprocess.check_output([output_path])
+    return run
+
+
+def main(iterations=10):
+    work_dir = tempfile.mkdtemp()
+    builder = DirectBuilder(Toolchain.instance())
+    try:
+        source_path = os.path.join(work_dir, "main.go")
+        with open(source_path, "w") as f:
+            f.write(program(0))
+        # warm GOCACHE and the importcfg so only per-line cost is measured
+        go_build(source_path, os.path.join(work_dir, "main"))
+        builder.importcfg(["fmt", "strings"])
+        results = [
+            measure("go run", go_run, iterations, work_dir),
+            measure("go build + exec", go_build, iterations, work_dir),
+            measure("direct compile/link + exec", direct(builder),
+                    iterations, work_dir),
+        ]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("{0:<28} {1:>10} {2:>10} {3:>10}".format(
+        "mode", "median ms", "min ms", "max ms"
+    ))
+    for name, median, low, high in results:
+        print("{0:<28} {1:>10.1f} {2:>10.1f} {3:>10.1f}".format(
+            name, median, low, high
+        ))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
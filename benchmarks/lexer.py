@@ -0,0 +1,73 @@
+# coding: utf8
+"""Tokens/sec of the single-pass lexer against the recursive splitter it
+replaced in Block.parse_to_codes.
+
+    python benchmarks/lexer.py [repeat]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gonsole.block.codes import filter_real_codes  # noqa: E402
+from gonsole.block.lexer import tokenize  # noqa: E402
+
+
+SPLIT_SYMBOL = [' ', ',', ';', '(', '=', '+', '-', '*', '/']
+
+LINES = [
+    'fmt.Println("hello world")',
+    'a := strings.ToUpper(b) + strings.Repeat("x", n*2)',
+    'for i := 0; i < len(items); i++ { total += items[i].Price * qty }',
+    'result, err := strconv.Atoi(fmt.Sprintf("%d", counter.Get() - 1))',
+    'if v, ok := cache[key]; ok && v != nil { return v.(string), nil }',
+    'x, y, z := math.Sqrt(a*a + b*b), sort.Ints(list), os.Getenv("HOME")',
+]
+
+
+def split_with_symbols(code, symbols):
+    if len(symbols) <= 0:
+        return [code.strip()]
+    if code.find(symbols[0]) == -1:
+        return split_with_symbols(code, symbols[1:])
+
+    codes = [code]
+    for c in code.split(symbols[0]):
+        codes.extend(split_with_symbols(c.strip(') '), symbols[1:]))
+    return codes
+
+
+def splitter(code):
+    return filter_real_codes(split_with_symbols(code, SPLIT_SYMBOL))
+
+
+def lexer(code):
+    return list(tokenize(code))
+
+
+def measure(name, parse, repeat):
+    tokens = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in LINES:
+            tokens += len(parse(line))
+    elapsed = time.perf_counter() - start
+    lines = repeat * len(LINES)
+    return name, lines / elapsed, tokens / elapsed, tokens / lines
+
+
+def main(repeat=5000):
+    print("{0:<10} {1:>12} {2:>12} {3:>12}".format(
+        "parser", "lines/sec", "tokens/sec", "tokens/line"
+    ))
+    for name, parse in (("splitter", splitter), ("lexer", lexer)):
+        name, lines, tokens, per_line = measure(name, parse, repeat)
+        print("{0:<10} {1:>12.0f} {2:>12.0f} {3:>12.1f}".format(
+            name, lines, tokens, per_line
+        ))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
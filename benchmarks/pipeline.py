@@ -0,0 +1,225 @@
+# coding: utf8
+"""Time gonsole's own per-line pipeline on synthetic sessions.
+
+A fake ``go`` (benchmarks/fake_go/go) is put first on PATH so compile
+cost is excluded unless ``--real-go`` is given. Results are printed as
+JSON; compare two runs with ``--compare previous.json``.
+
+    python benchmarks/pipeline.py --sizes 10 100 1000 --output now.json
+    python benchmarks/pipeline.py --compare before.json --fail-over 1.25
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import collections
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+FAKE_GO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_go")
+sys.path.insert(0, ROOT)
+
+PACKAGES = ["strings", "strconv", "math", "sort", "bytes", "unicode"]
+
+
+def synthetic_session(size):
+    lines = []
+    varis = []
+    funcs = []
+    index = 0
+    while len(lines) < size:
+        index += 1
+        kind = index % 10
+        if kind == 0 and index // 10 <= len(PACKAGES):
+            lines.append('import "{0}"'.format(PACKAGES[index // 10 - 1]))
+        elif kind in (1, 4, 7) or not varis:
+            vari = "v{0}".format(index)
+            if len(varis) >= 2:
+                lines.append("{0} := {1} + {2}".format(
+                    vari, varis[-1], varis[-2]
+                ))
+            else:
+                lines.append("{0} := {1}".format(vari, index))
+            varis.append(vari)
+        elif kind == 2:
+            func = "f{0}".format(index)
+            lines.extend([
+                "func {0}(x int) int {{".format(func),
+                "if x > {0} {{".format(index),
+                "return x - {0}".format(index),
+                "}",
+                "return x + 1",
+                "}",
+            ])
+            funcs.append(func)
+        elif kind == 3 and funcs:
+            lines.append("fmt.Println({0}({1}))".format(funcs[-1], varis[-1]))
+        elif kind == 5:
+            lines.extend([
+                "if {0} > 0 {{".format(varis[-1]),
+                "fmt.Println({0})".format(varis[-1]),
+                "}",
+            ])
+        else:
+            lines.append("fmt.Println({0})".format(varis[-1]))
+    return lines
+
+
+class Stages(object):
+
+    def __init__(self):
+        self.timings = collections.defaultdict(list)
+        self._active = set()
+
+    def wrap(self, name, func):
+        def timed(*args, **kwargs):
+            if name in self._active:
+                return func(*args, **kwargs)
+            self._active.add(name)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.timings[name].append(time.perf_counter() - start)
+                self._active.discard(name)
+        return timed
+
+    def summary(self):
+        result = dict()
+        for name, timings in sorted(self.timings.items()):
+            timings = sorted(timings)
+            result[name] = {
+                "calls": len(timings),
+                "total_ms": sum(timings) * 1000,
+                "mean_ms": sum(timings) * 1000 / len(timings),
+                "p50_ms": timings[len(timings) // 2] * 1000,
+                "p95_ms": timings[int(len(timings) * 0.95)] * 1000,
+                "max_ms": timings[-1] * 1000,
+            }
+        return result
+
+
+def instrument(console, stages):
+    console.block_generator.generate = stages.wrap(
+        "generate", console.block_generator.generate
+    )
+    console.prepare = stages.wrap("prepare", console.prepare)
+    console._inflate = stages.wrap("inflate", console._inflate)
+    console.execute = stages.wrap("execute", console.execute)
+    console.codes.add = stages.wrap("codes.add", console.codes.add)
+    console.custom_methods.scan_used = stages.wrap(
+        "custom_methods.scan_used", console.custom_methods.scan_used
+    )
+    console.packages.scan_used = stages.wrap(
+        "packages.scan_used", console.packages.scan_used
+    )
+
+
+def run_session(size, backend):
+    from gonsole.cache import BuildCache
+    from gonsole.console import Console
+    from gonsole.toolchain import Toolchain
+    from gonsole.backends import BuildBackend
+
+    lines = iter(synthetic_session(size))
+    # run from main's temporary directory, nothing is left behind
+    console = Console(
+        backend=backend, workspace_root=os.path.join(os.getcwd(), "workspace")
+    )
+    try:
+        console.read_multi_line = lambda iter_count=1: next(lines)
+        console.block_generator.continue_input = console.read_multi_line
+        if isinstance(console.backend, BuildBackend):
+            console.backend.cache = BuildCache.instance(
+                Toolchain.instance(), os.path.join(os.getcwd(), "build-cache")
+            )
+
+        stages = Stages()
+        instrument(console, stages)
+        line_count = 0
+        start = time.perf_counter()
+        for line in lines:
+            line_count += 1
+            console.run_line(line)
+        wall = time.perf_counter() - start
+    finally:
+        console.close()
+    return {
+        "lines": size,
+        "inputs": line_count,
+        "wall_ms": wall * 1000,
+        "per_input_ms": wall * 1000 / max(line_count, 1),
+        "stages": stages.summary(),
+    }
+
+
+def compare(previous, current, fail_over):
+    previous = dict((r["lines"], r) for r in previous["results"])
+    regressed = False
+    for result in current["results"]:
+        before = previous.get(result["lines"])
+        if not before:
+            continue
+        for name, stage in sorted(result["stages"].items()):
+            old = before["stages"].get(name)
+            if not old or not old["mean_ms"]:
+                continue
+            ratio = stage["mean_ms"] / old["mean_ms"]
+            flag = ""
+            if fail_over and ratio > fail_over:
+                flag, regressed = "  REGRESSED", True
+            sys.stderr.write("{0:>6} {1:<26} {2:>9.3f} -> {3:>9.3f} ms"
+                             " ({4:.2f}x){5}\n".format(
+                                 result["lines"], name, old["mean_ms"],
+                                 stage["mean_ms"], ratio, flag))
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10, 100, 1000, 10000])
+    parser.add_argument("--backend", default="build")
+    parser.add_argument("--real-go", action="store_true")
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    parser.add_argument("--fail-over", type=float)
+    args = parser.parse_args(argv)
+
+    if not args.real_go:
+        os.environ["PATH"] = FAKE_GO + os.pathsep + os.environ["PATH"]
+    # the session writes into the current directory, keep it out of the tree
+    work_dir = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        results = [run_session(size, args.backend) for size in args.sizes]
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "python": platform.python_version(),
+        "backend": args.backend,
+        "real_go": args.real_go,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(json.load(f), report, args.fail_over):
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
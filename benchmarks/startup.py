@@ -0,0 +1,110 @@
+# coding: utf8
+"""Time from starting gonsole to its first prompt.
+
+Each run starts ``python -m gonsole.gonsole --no-warm-up`` with stdin on a
+pipe and stops the clock when ``[1] >`` is written, the fake ``go``
+(benchmarks/fake_go/go) is first on PATH. Results are printed as JSON;
+compare two runs with ``--compare previous.json``.
+
+    python benchmarks/startup.py --runs 20 --output now.json
+    python benchmarks/startup.py --compare before.json --fail-over 1.25
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+FAKE_GO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_go")
+
+PROMPT = b"[1] >"
+
+
+def time_to_prompt(env):
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gonsole.gonsole", "--no-warm-up"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL, cwd=ROOT, env=env
+    )
+    output = b""
+    try:
+        while PROMPT not in output:
+            chunk = os.read(process.stdout.fileno(), 4096)
+            if not chunk:
+                raise RuntimeError("gonsole exited before its prompt")
+            output += chunk
+        return (time.perf_counter() - start) * 1000
+    finally:
+        process.stdin.close()  # EOF makes gonsole say bye and exit
+        process.wait()
+        process.stdout.close()
+
+
+def import_times(env):
+    # cumulative import time of each top level module, from -X importtime
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import gonsole.gonsole"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, cwd=ROOT, env=env
+    )
+    modules = dict()
+    for line in result.stderr.decode("utf8", "replace").splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit() and not name.startswith("   "):
+            modules[name.strip()] = int(cumulative) / 1000.0
+    return modules
+
+
+def compare(previous, current, fail_over):
+    old, new = previous["time_to_prompt_ms"], current["time_to_prompt_ms"]
+    ratio = new / old if old else 1
+    regressed = bool(fail_over and ratio > fail_over)
+    sys.stderr.write("time to prompt {0:.1f} -> {1:.1f} ms ({2:.2f}x){3}\n".format(
+        old, new, ratio, "  REGRESSED" if regressed else ""
+    ))
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    parser.add_argument("--fail-over", type=float)
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    env["PATH"] = FAKE_GO + os.pathsep + env["PATH"]
+    time_to_prompt(env)  # the first start also writes the .pyc files
+    timings = sorted(time_to_prompt(env) for _ in range(args.runs))
+
+    report = {
+        "python": platform.python_version(),
+        "runs": args.runs,
+        # the median, single runs are noisy
+        "time_to_prompt_ms": timings[len(timings) // 2],
+        "min_ms": timings[0],
+        "max_ms": timings[-1],
+        "import_ms": import_times(env),
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(json.load(f), report, args.fail_over):
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# coding: utf8
+
+import time
+import asyncio
+
+from .cache import BuildCache
+from .pool import CompilePool
+from .metrics import Metrics
+from .process import run_process
+from .toolchain import DirectBuilder
+from .const import (
+    PRIORITY_WARM_UP,
+    PRIORITY_INTERACTIVE
+)
+
+
+class BuildBackend(object):
+
+    def __init__(self, toolchain, metrics=None, pool=None, environ=None):
+        self.toolchain = toolchain
+        self.cache = BuildCache.instance(toolchain)
+        # what builds a program the cache doesn't have yet
+        self.builder = toolchain
+        self.metrics = metrics or Metrics()
+        self.pool = pool or CompilePool.instance()
+        # the session's own go environment, the toolchain is shared
+        self.environ = environ
+
+    def _submit(self, key, source, file_name, priority):
+        # the job carries the source itself, the cache builds its own copy
+        return self.pool.submit(
+            key, self.cache.build,
+            (source, file_name, self.environ, self.builder), priority
+        )
+
+    async def _compile(self, source, file_name, priority):
+        key = self.cache.key(source)
+        start = time.perf_counter()
+        result = self.cache.get(key)
+        if result:
+            self.metrics.record(
+                "compile", (time.perf_counter() - start) * 1000
+            )
+            return result
+        future = self._submit(key, source, file_name, priority)
+        # the future may be shared with other sessions, and a cancelled
+        # compile finishes in the background and is cached anyway
+        result = await asyncio.shield(asyncio.wrap_future(future))
+        elapsed = time.perf_counter() - start
+        duration = getattr(future, "duration", 0)
+        self.metrics.record("wait", max(elapsed - duration, 0) * 1000)
+        self.metrics.record("compile", duration * 1000)
+        return result
+
+    async def run(self, source, file_name, timeout=None, stdout=None,
+                  priority=PRIORITY_INTERACTIVE, stderr=None):
+        for attempt in range(2):
+            result = await self._compile(source, file_name, priority)
+            if not result.success:
+                return b"", result.error
+            try:
+                with self.metrics.timer("run"):
+                    process = await run_process(
+                        [result.binary], timeout, stdout, stderr
+                    )
+                break
+            except FileNotFoundError:
+                # evicted by another session's build since, a miss after all
+                if attempt:
+                    raise
+        self.metrics.record_rusage(process.rusage)
+        err = process.err
+        if process.returncode and not err:
+            # what go run says, so the line counts as failed
+            err = "exit status {0}\n".format(process.returncode).encode("utf8")
+        return process.out, err
+
+    async def compile(self, source, file_name,
+                      priority=PRIORITY_INTERACTIVE):
+        # checks a program without running it, the error if it has one
+        result = await self._compile(source, file_name, priority)
+        return b"" if result.success else result.error
+
+    def warm_up(self, packages):
+        # runtime is what every program needs, even with no packages given
+        packages = ["runtime"] + sorted(set(packages) - {"runtime"})
+        return self.pool.submit(
+            "warm-up " + " ".join(packages), self.toolchain.compile_packages,
+            (packages, self.environ), PRIORITY_WARM_UP
+        )
+
+    def close(self):
+        pass
+
+
+class DirectBuildBackend(BuildBackend):
+
+    def __init__(self, toolchain, metrics=None, pool=None, environ=None):
+        super(DirectBuildBackend, self).__init__(
+            toolchain, metrics, pool, environ
+        )
+        self.builder = DirectBuilder(toolchain)
+
+
+BACKENDS = {
+    "build": BuildBackend,
+    "direct": DirectBuildBackend,
+}
+
+
+def create_backend(name, toolchain, metrics=None, environ=None):
+    return BACKENDS[name](toolchain, metrics, environ=environ)
@@ -1,12 +1,12 @@
 # coding: utf8
 
-import re
-
-from gonsole.utils import inflate_space
+from gonsole.utils import inflate_space, lazy_compile
 from .codes import filter_real_codes
+from .lexer import tokenize
 from .declared import (
     get_declared_varis,
     get_declared_symbol,
+    get_bound_names,
     get_batch_declared_varis
 )
 
@@ -37,74 +37,130 @@ class BlockGenerator:
 
 
 class Block:
-    VARIABLE_DECLARE_RE = re.compile("(var|const) (?P<varis>[_\w]+(, *[_\w]+)*)( [_\w]+)?(( )*=)?[^(]*")
-    BATCH_VARIABLE_DECLARED_RE = re.compile(r"(var|const)[ ]*\(")
-    TYPE_DEFINE_RE = re.compile("type (?P<var>\w+) *")
-    DECLARE_KEYWORD = re.compile("^(?P<keyword>(const|var|type)) ")
-    BATCH_DECLARE_RE = re.compile("(?P<var>[_\w]+) *=")
+    VARIABLE_DECLARE_RE = lazy_compile("(var|const) (?P<varis>[_\w]+(, *[_\w]+)*)( [_\w]+)?(( )*=)?[^(]*")
+    BATCH_VARIABLE_DECLARED_RE = lazy_compile(r"(var|const)[ ]*\(")
+    TYPE_DEFINE_RE = lazy_compile("type (?P<var>\w+) *")
+    DECLARE_KEYWORD = lazy_compile("^(?P<keyword>(const|var|type)) ")
+    BATCH_DECLARE_RE = lazy_compile("(?P<var>[_\w]+) *=")
 
     def __init__(self, code):
         self.codes = [code]
+        self._reset()
+
+    def _reset(self):
+        self._codes = None
+        self._tokens = None
+        self._token_set = None
+        self._names = None
+        self._bound_names = None
+        self._declared_varis = None
+        self._is_declared = None
+        self._deflated = dict()
 
     def append(self, code):
         self.codes.append(code)
+        self._reset()
 
     def is_func(self):
         return self.codes[0].startswith("func ")
 
     def get_codes(self):
-        codes = []
-        for code in self.codes:
-            (
-                codes.extend(code.get_codes())
-                if isinstance(code, Block) else codes.append(code)
-            )
-        return codes
+        if self._codes is None:
+            codes = []
+            for code in self.codes:
+                (
+                    codes.extend(code.get_codes())
+                    if isinstance(code, Block) else codes.append(code)
+                )
+            self._codes = codes
+        return self._codes
 
     def deflate(self, indent=0):
-        codes = []
-        for code in self.codes:
-            (
-                codes.extend(code.deflate(indent+1))
-                if isinstance(code, Block)
-                else codes.append(inflate_space(code, indent))
-            )
-        return codes
+        if indent not in self._deflated:
+            codes = []
+            for code in self.codes:
+                (
+                    codes.extend(code.deflate(indent+1))
+                    if isinstance(code, Block)
+                    else codes.append(inflate_space(code, indent))
+                )
+            self._deflated[indent] = codes
+        return self._deflated[indent]
 
     @classmethod
     def _get_batch_declared_var(cls, code):
         return cls.BATCH_DECLARE_RE.match(code).group("var")
 
     def get_declared_varis(self):
-        varis = []
-        varis.extend(get_batch_declared_varis(self.codes))
-        for code in self.codes:
-            varis.extend(get_declared_varis(code))
-        return varis
+        if self._declared_varis is None:
+            varis = []
+            varis.extend(get_batch_declared_varis(self.codes))
+            for code in self.codes:
+                # what a nested block declares is local to it
+                if not isinstance(code, Block):
+                    varis.extend(get_declared_varis(code))
+            self._declared_varis = varis
+        return self._declared_varis
 
     def is_declared(self):
-        return get_declared_symbol(
-            filter_real_codes(self.codes[0].split(";"))[-1]
-        ) and True or False
-
-    @classmethod
-    def _parse_code_with_symbols(cls, code, symbols):
-        if len(symbols) <= 0:
-            return [code.strip()]
-        if code.find(symbols[0]) == -1:
-            return cls._parse_code_with_symbols(code, symbols[1:])
-
-        codes = [code]
-        for c in code.split(symbols[0]):
-            codes.extend(
-                cls._parse_code_with_symbols(c.strip(') '), symbols[1:])
-            )
-        return codes
+        if self._is_declared is None:
+            self._is_declared = get_declared_symbol(
+                filter_real_codes(self.codes[0].split(";"))[-1]
+            ) and True or False
+        return self._is_declared
 
     def parse_to_codes(self):
-        SPLIT_SYMBOL = [' ', ',', ';', '(', '=', '+', '-', '*', '/']
-        codes = []
-        for code in self.get_codes():
-            codes.extend(self._parse_code_with_symbols(code, SPLIT_SYMBOL))
+        if self._tokens is None:
+            self._tokens = list(tokenize("\n".join(self.get_codes())))
+        return self._tokens
+
+    def get_token_set(self):
+        if self._token_set is None:
+            self._token_set = frozenset(self.parse_to_codes())
+        return self._token_set
+
+    def get_names(self):
+        """The identifiers the block refers to, ``fmt`` for ``fmt.Println``."""
+        if self._names is None:
+            self._names = frozenset(
+                token.split(".", 1)[0] for token in self.get_token_set()
+            )
+        return self._names
+
+    def get_bound_names(self):
+        """The names the block itself binds, locals and parameters too."""
+        if self._bound_names is None:
+            names = set()
+            for code in self.get_codes():
+                names.update(get_bound_names(code))
+            if self.is_declared():
+                names.update(self.get_declared_varis())
+            self._bound_names = frozenset(names)
+        return self._bound_names
+
+    def dump(self):
+        """The block and its analysis as JSON-ready data, see load."""
+        return {
+            "codes": [
+                code.dump() if isinstance(code, Block) else code
+                for code in self.codes
+            ],
+            "names": sorted(self.get_names()),
+            "declared": (
+                self.get_declared_varis() if self.is_declared() else None
+            ),
+        }
 
-        return filter_real_codes(codes)
+    @classmethod
+    def load(cls, data):
+        codes = [
+            cls.load(code) if isinstance(code, dict) else code
+            for code in data["codes"]
+        ]
+        block = cls(codes[0])
+        block.codes.extend(codes[1:])
+        # the analysis comes with the block, nothing is parsed again
+        block._names = frozenset(data["names"])
+        block._is_declared = data["declared"] is not None
+        block._declared_varis = data["declared"] or []
+        return block
@@ -1,10 +1,12 @@
 # coding: utf8
 
-import re
+from gonsole.utils import lazy_compile
+
+
+NOT_REAL_CODES_RE = lazy_compile(r"(\"|'|\d)+")
 
 
 def filter_real_codes(codes):
-    NOT_REAL_CODES_RE = re.compile(r"(\"|'|\d)+")
     return [
         code for
         code in codes
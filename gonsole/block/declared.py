@@ -1,15 +1,20 @@
 # coding: utf8
 
-import re
-
+from gonsole.utils import lazy_compile
 from .codes import filter_real_codes
+from .lexer import tokenize
 
 
-VARIABLE_DECLARE_RE = re.compile("(var|const) (?P<varis>[_\w]+(, *[_\w]+)*)( [_\w]+)?(( )*=)?[^(]*")
-BATCH_VARIABLE_DECLARED_RE = re.compile(r"(var|const)[ ]*\(")
-TYPE_DEFINE_RE = re.compile("type (?P<var>\w+) *")
-DECLARE_KEYWORD = re.compile("^(?P<keyword>(const|var|type)) ")
-BATCH_DECLARE_RE = re.compile("(?P<var>[_\w]+) *=")
+VARIABLE_DECLARE_RE = lazy_compile("(var|const) (?P<varis>[_\w]+(, *[_\w]+)*)( [_\w]+)?(( )*=)?[^(]*")
+BATCH_VARIABLE_DECLARED_RE = lazy_compile(r"(var|const)[ ]*\(")
+TYPE_DEFINE_RE = lazy_compile("type (?P<var>\w+) *")
+DECLARE_KEYWORD = lazy_compile("^(?P<keyword>(const|var|type)) ")
+BATCH_DECLARE_RE = lazy_compile("(?P<var>[_\w]+) *=")
+SHORT_DECLARE_RE = lazy_compile(r"(?P<varis>\w+(?:\s*,\s*\w+)*)\s*:=")
+KEYWORD_DECLARE_RE = lazy_compile(
+    r"\b(?:var|const|type)\s+(?P<varis>\w+(?:\s*,\s*\w+)*)"
+)
+FUNC_RE = lazy_compile(r"\bfunc\b")
 
 
 def get_declared_symbol(code):
@@ -54,3 +59,35 @@ def get_batch_declared_varis(codes):
         return [get_declared_var(var.strip())
                 for var in codes[1].get_codes()]
     return []
+
+
+def get_bound_names(code):
+    """Every name a line may bind, also inside functions and statements.
+
+    Parameters, results and receivers count, and so does the function's
+    own name; a line quoting such code only binds more.
+    """
+    names = set()
+    for result in SHORT_DECLARE_RE.finditer(code):
+        names.update(var.strip() for var in result.group("varis").split(","))
+    for result in KEYWORD_DECLARE_RE.finditer(code):
+        names.update(var.strip() for var in result.group("varis").split(","))
+    for result in FUNC_RE.finditer(code):
+        names.update(
+            name for name in tokenize(_signature(code, result.end()))
+            if "." not in name
+        )
+    return names
+
+
+def _signature(code, start):
+    # up to the body, a struct{ in the parameters is not the body
+    depth = 0
+    for end in range(start, len(code)):
+        if code[end] == "(":
+            depth += 1
+        elif code[end] == ")":
+            depth -= 1
+        elif code[end] == "{" and depth <= 0:
+            return code[start:end]
+    return code[start:]
@@ -0,0 +1,38 @@
+# coding: utf8
+
+import re
+
+from gonsole.utils import lazy_compile
+
+
+KEYWORDS = frozenset([
+    "break", "case", "chan", "const", "continue", "default", "defer",
+    "else", "fallthrough", "for", "func", "go", "goto", "if", "import",
+    "interface", "map", "package", "range", "return", "select", "struct",
+    "switch", "type", "var"
+])
+
+TOKEN_RE = lazy_compile(r"""
+    "(?:[^"\\\n]|\\.)*"?
+  | '(?:[^'\\\n]|\\.)*'?
+  | `[^`]*`?
+  | //[^\n]*
+  | /\*.*?(?:\*/|\Z)
+  | \.?\d(?:[\w.]|(?<=[eEpP])[+-])*
+  | (?<!\.)(?P<name>[^\W\d]\w*(?:\.[^\W\d]\w*)*)
+  | [^\W\d]\w*
+""", re.X | re.S)
+
+
+def tokenize(source):
+    """Yield the identifier and selector tokens of Go source in one pass.
+
+    A selector chain such as ``fmt.Println`` or ``a.b.c`` is a single
+    token and keywords are dropped. String, raw string and rune literals,
+    comments and numbers are skipped, and so are field or method names
+    selected from an expression result (the ``get`` in ``f().get``).
+    """
+    for match in TOKEN_RE.finditer(source):
+        name = match.group("name")
+        if name and name not in KEYWORDS:
+            yield name
@@ -0,0 +1,213 @@
+# coding: utf8
+
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+import collections
+
+from .const import BUILD_CACHE_DIR, BUILD_CACHE_SIZE, OUTPUT_CACHE_SIZE
+
+
+class BuildResult(object):
+
+    def __init__(self, binary=None, error=None, hit=False):
+        self.binary = binary
+        self.error = error
+        self.hit = hit
+
+    @property
+    def success(self):
+        return self.binary is not None
+
+
+class BuildCache(object):
+
+    BINARY_NAME = "main"
+    ERROR_NAME = "error"
+
+    _instances = dict()
+
+    _instances_lock = threading.Lock()
+
+    def __init__(self, toolchain, root=BUILD_CACHE_DIR,
+                 max_size=BUILD_CACHE_SIZE):
+        self.toolchain = toolchain
+        self.root = os.path.expanduser(root)
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._sizes = None
+
+    @classmethod
+    def instance(cls, toolchain, root=BUILD_CACHE_DIR):
+        # one per directory, so every session counts the same sizes and
+        # evicts under the same lock
+        key = (toolchain, os.path.expanduser(root))
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(toolchain, root)
+            return cls._instances[key]
+
+    def key(self, source):
+        digest = hashlib.sha256(self.toolchain.fingerprint.encode("utf8"))
+        digest.update(b"\0")
+        digest.update(source.encode("utf8"))
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key):
+        entry = self._entry_path(key)
+        binary = os.path.join(entry, self.BINARY_NAME)
+        error = os.path.join(entry, self.ERROR_NAME)
+        try:
+            if os.path.exists(binary):
+                result = BuildResult(binary=binary, hit=True)
+            elif os.path.exists(error):
+                with open(error, "rb") as f:
+                    result = BuildResult(error=f.read(), hit=True)
+            else:
+                return None
+            os.utime(entry, None)
+        except OSError:
+            return None
+        return result
+
+    def build(self, source, file_name, environ=None, builder=None):
+        key = self.key(source)
+        result = self.get(key)
+        if result:
+            return result
+
+        if not os.path.exists(self.root):
+            os.makedirs(self.root)
+        work_dir = tempfile.mkdtemp(prefix="build-", dir=self.root)
+        try:
+            # the session may rewrite its file before a queued build runs,
+            # only the source the key was made of may be built
+            source_path = os.path.join(work_dir, file_name)
+            with open(source_path, "w") as f:
+                f.write(source)
+            returncode, out = (builder or self.toolchain).build(
+                source_path, os.path.join(work_dir, self.BINARY_NAME), environ
+            )
+            os.remove(source_path)
+            if returncode < 0:
+                # killed by a signal, says nothing of the source
+                return BuildResult(error=out)
+            if returncode != 0:
+                with open(os.path.join(work_dir, self.ERROR_NAME), "wb") as f:
+                    f.write(out)
+            self._store(key, work_dir)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        result = self.get(key)
+        if result:
+            result.hit = False
+            return result
+        return BuildResult(error=out)
+
+    def _store(self, key, work_dir):
+        entry = self._entry_path(key)
+        parent = os.path.dirname(entry)
+        if not os.path.exists(parent):
+            os.makedirs(parent)
+        try:
+            os.rename(work_dir, entry)
+        except OSError:
+            return  # another session stored the same program first
+        with self._lock:
+            sizes = self._load_sizes()
+            sizes[entry] = self._size_of(entry)
+            self._evict(sizes, keep=entry)
+
+    def _size_of(self, entry):
+        return sum(
+            os.path.getsize(os.path.join(entry, name))
+            for name in os.listdir(entry)
+        )
+
+    def _load_sizes(self):
+        if self._sizes is None:
+            self._sizes = dict()
+            for prefix in os.listdir(self.root):
+                prefix_path = os.path.join(self.root, prefix)
+                if len(prefix) != 2 or not os.path.isdir(prefix_path):
+                    continue
+                for key in os.listdir(prefix_path):
+                    entry = os.path.join(prefix_path, key)
+                    self._sizes[entry] = self._size_of(entry)
+        return self._sizes
+
+    def _last_used(self, entry):
+        try:
+            return os.path.getmtime(entry)
+        except OSError:
+            return 0
+
+    def _evict(self, sizes, keep=None):
+        total = sum(sizes.values())
+        if total <= self.max_size:
+            return
+        for entry in sorted(sizes, key=self._last_used):
+            if total <= self.max_size:
+                break
+            if entry == keep:
+                continue
+            total -= sizes.pop(entry)
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+            self._sizes = None
+
+
+class OutputCache(object):
+    """The output of programs that print the same on every run.
+
+    Kept in memory by the hash of the source, the least recently used
+    entries go first once the lines add up to more than max_size bytes.
+    """
+
+    def __init__(self, max_size=OUTPUT_CACHE_SIZE):
+        self.max_size = max_size
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._size = 0
+        self._entries = collections.OrderedDict()
+
+    def key(self, source):
+        return hashlib.sha256(source.encode("utf8")).hexdigest()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, lines):
+        size = sum(len(line) for line in lines)
+        if size > self.max_size:
+            return
+        if key in self._entries:
+            self._size -= self._entries.pop(key)[1]
+        self._entries[key] = (list(lines), size)
+        self._size += size
+        while self._size > self.max_size:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._size -= evicted
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = 100.0 * self.hits / lookups if lookups else 0
+        return "output cache: {0} hits, {1} misses ({2:.0f}% hit rate)".format(
+            self.hits, self.misses, rate
+        )
@@ -1,15 +1,14 @@
 # coding: utf8
 
-import re
 import sys
-import readline  # import readline to fix console bug
 
 from .const import STANDARD_SPACE
+from .utils import lazy_compile
 from .block import KeyboardInterruptInBlock, BlockGenerator
 
 
 class Cmd(object):
-    DIRECT_COMMAND_RE = re.compile(r"^(\d|\"|')+")
+    DIRECT_COMMAND_RE = lazy_compile(r"^(\d|\"|')+")
 
     def __init__(self):
         self.stdout = sys.stdout
@@ -29,11 +28,14 @@ class Cmd(object):
     def run_direct_command(self, text):
         pass
 
-    def try_run_direct_command(self, text):
-        if self.DIRECT_COMMAND_RE.match(text):
-            return self.run_direct_command(text)
+    def run_line(self, line):
+        # a direct command that prints nothing must not run again as code
+        if self.DIRECT_COMMAND_RE.match(line):
+            return self.run_direct_command(line)
+        return self._run(line)
 
     def loop(self):
+        import readline  # import readline to fix console bug
         self.output(self.init())
         while True:
             try:
@@ -41,7 +43,7 @@ class Cmd(object):
                 line = input("[{0}] >".format(self.lineno)).strip()
                 if not line:
                     continue
-                result = self.try_run_direct_command(line) or self._run(line)
+                result = self.run_line(line)
                 if result:
                     self.output(result)
             except KeyboardInterruptInBlock:
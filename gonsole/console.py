@@ -1,125 +1,415 @@
 # coding: utf8
 
 import os
-import re
-import subprocess
+import json
+import signal
+import threading
 
 from .cmd import Cmd
-from .const import PRINTLN, GO_TEMPLATE
-from .utils import post_to_playground
-from .handlers import AssignmentManager
+from .const import (
+    AUTOSAVE_FILE,
+    PRINTLN,
+    GO_TEMPLATE,
+    EXECUTE_TIMEOUT,
+    ERROR_HEAD_LINES,
+    ERROR_TAIL_LINES,
+    NONDETERMINISTIC_PACKAGES,
+    PRIORITY_INTERACTIVE,
+    OUTPUT_HEAD_LINES,
+    OUTPUT_TAIL_LINES,
+    PLAYGROUND_URL,
+    SESSION_FILE_VERSION,
+    WARM_UP_PACKAGES
+)
+from .block import Block
+from .output import OutputLimiter
+from .render import Template
 from .handlers import CodeHandler
 from .handlers import PackageHandler
 from .handlers import FunctionHandler
-from .exceptions import NotDeclaredError
+from .metrics import Metrics
+from .session import Session
+from .stdlib import StdlibIndex
+from .toolchain import Toolchain
+from .utils import lazy_compile
+from .workspace import Workspace
+from .cache import OutputCache
+from .evaluator import evaluate
+from .exceptions import (
+    NotDeclaredError,
+    NotConstantError,
+    PlaygroundError,
+    UnknownPackageError
+)
 
 
-error_detail_re = re.compile("_cache/main.go:\d+: (?P<detail>.*)$")
+error_detail_re = lazy_compile(r"\.go:\d+(:\d+)?: (?P<detail>.*)$")
+go_statement_re = lazy_compile(r"(?m)(?:^|[;{])\s*go\s")
+stdin_read_re = lazy_compile(r"\bfmt\.Scan")
 
 
 class Console(Cmd):
 
-    def __init__(self):
+    def __init__(self, backend="build", stats_log=None,
+                 timeout=EXECUTE_TIMEOUT, stream=True,
+                 output_head=OUTPUT_HEAD_LINES, output_tail=OUTPUT_TAIL_LINES,
+                 workspace_root=None, session=None,
+                 playground_url=PLAYGROUND_URL,
+                 warm_up_packages=WARM_UP_PACKAGES, output_cache=True,
+                 autosave=AUTOSAVE_FILE):
         super(Console, self).__init__()
-        self.CACHE_FILE_PATH = self._generate_file_path()
-        self._template = GO_TEMPLATE
-        self.codes = CodeHandler()
-        self.packages = PackageHandler()
-        self.custom_methods = FunctionHandler()
-        self.assignment_manager = AssignmentManager.instance()
-
-    def _generate_file_path(self):
-        file_path = os.path.join(
-            "", "tmp", "console", "_cache"
+        self.timeout = timeout or None
+        self.stream = stream
+        self.output_head = output_head
+        self.output_tail = output_tail
+        self._loop = None
+        self._playground = None
+        # None turns the warm-up off, an empty list still compiles the runtime
+        self.warm_up_packages = warm_up_packages
+        self.playground_url = playground_url
+        self.errors = 0
+        # where this console's compiles queue in the shared compile pool
+        self.priority = PRIORITY_INTERACTIVE
+        self.workspace = Workspace(workspace_root)
+        self._template = Template(GO_TEMPLATE)
+        self._start_session(session or Session())
+        # None turns saving on exit off
+        self.autosave = autosave and os.path.expanduser(autosave)
+        self.metrics = Metrics(stats_log)
+        self.output_cache = OutputCache()
+        self.output_cache.enabled = output_cache
+        self.backend_name = backend
+        self._backend = None
+        self._backend_lock = threading.Lock()
+
+    def _start_session(self, session):
+        self.session = session
+        self.codes = CodeHandler(self.session)
+        self.packages = PackageHandler(
+            self.session, StdlibIndex.instance()
         )
-        if not os.path.exists(file_path):
-            os.makedirs(file_path)
-        return os.path.join(file_path, "main.go")
+        self.custom_methods = FunctionHandler(self.session)
+        self.assignment_manager = self.session.assignment_manager
+
+    @property
+    def backend(self):
+        # the backends pull in asyncio, which the prompt doesn't need
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    from .backends import create_backend
+                    self._backend = create_backend(
+                        self.backend_name, Toolchain.instance(), self.metrics,
+                        self.workspace.go_env()
+                    )
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend):
+        self._backend = backend
+
+    def init(self):
+        if self.warm_up_packages is not None:
+            threading.Thread(
+                target=self.warm_up, name="gonsole-warm-up", daemon=True
+            ).start()
+        return super(Console, self).init()
+
+    def warm_up(self):
+        try:
+            self.backend.warm_up(self.warm_up_packages).result()
+            self.packages.stdlib.load()  # ready for the first selector
+        except Exception:
+            pass  # only ever a head start, the real build reports errors
+
+    @property
+    def playground(self):
+        if self._playground is None:
+            from .playground import PlaygroundClient
+            self._playground = PlaygroundClient(self.playground_url)
+        return self._playground
 
     def do_playground(self, *args):
-        print(post_to_playground(self.prepare()))
+        try:
+            return self.playground.share(self.prepare())
+        except PlaygroundError as e:
+            return str(e)
 
     def do_export(self, *args):
         self._write_to_file(args[0], self.prepare())
 
     def do_import(self, *args):
+        errors = list()
         if args[-1].endswith("("):
             code = self.read_multi_line()
             while code != ")":
-                self._cache_import(code)
+                errors.append(self._cache_import(code))
                 code = self.read_multi_line()
         else:
-            self._cache_import(args[0])
+            errors.append(self._cache_import(args[0]))
+        return "\n".join(error for error in errors if error) or None
+
+    def do_stats(self, *args):
+        return "\n".join([self.metrics.summary(), self.output_cache.summary()])
+
+    def do_nocache(self, *args):
+        self.output_cache.enabled = not self.output_cache.enabled
+        return "output cache {0}".format(
+            "on" if self.output_cache.enabled else "off"
+        )
+
+    def do_save(self, *args):
+        path = os.path.expanduser(args[0]) if args else self.autosave
+        if not path:
+            self.errors += 1
+            return "no file given"
+        history = self.codes.history
+        data = {
+            "version": SESSION_FILE_VERSION,
+            "packages": list(self.packages.get_declared()),
+            "methods": [
+                {"name": name, "block": method.dump()}
+                for name, method in self.custom_methods.get_declared().items()
+            ],
+            "codes": [block.dump() for block in history],
+        }
+        temp_path = "{0}.{1}.tmp".format(path, os.getpid())
+        try:
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(temp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            self.errors += 1
+            return "could not save to {0}: {1}".format(path, e.strerror)
+        return "saved {0} lines to {1}".format(len(history), path)
+
+    def do_load(self, *args):
+        path = os.path.expanduser(args[0]) if args else self.autosave
+        if not path:
+            self.errors += 1
+            return "no file given"
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") != SESSION_FILE_VERSION:
+                raise ValueError("unknown version")
+            packages = data["packages"]
+            methods = [
+                (method["name"], Block.load(method["block"]))
+                for method in data["methods"]
+            ]
+            history = [Block.load(block) for block in data["codes"]]
+        except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+            self.errors += 1
+            return "could not load {0}: {1}".format(
+                path, getattr(e, "strerror", None) or e
+            )
+        # the blocks come analysed, nothing is compiled until the end
+        self._start_session(Session())
+        for package in packages:
+            self.packages.add(package)
+        for name, method in methods:
+            self.custom_methods.add_declared(name, method)
+        self.codes.restore(history)
+        err = self._check_session()
+        message = "loaded {0} lines from {1}".format(len(history), path)
+        if err:
+            self.errors += 1
+            return "{0}, but they don't compile:\n{1}".format(
+                message, self._parse_err_message(err)
+            )
+        return message
+
+    def _check_session(self):
+        # one compile of a program using every name the session declared
+        import asyncio
+        uses = list()
+        for name, block in self.codes.get_declared().items():
+            if name == "_":
+                continue
+            if block.codes[0].startswith("type "):
+                uses.append("_ = new({0})".format(name))
+            else:
+                uses.append("_ = {0}".format(name))
+        uses.extend(
+            "_ = {0}".format(name)
+            for name in self.custom_methods.get_declared()
+        )
+        if not uses:
+            return b""
+        check = Block(uses[0])
+        check.codes.extend(uses[1:])
+        self.cache_code(check)
+        try:
+            source = self.prepare()
+        finally:
+            self.codes.rollback()
+            self.codes.clear()
+            self.assignment_manager.clear()
+        try:
+            return self._run_interruptible(self.backend.compile(
+                source, self.workspace.SOURCE_NAME, priority=self.priority
+            ))
+        except asyncio.CancelledError:
+            return b"interrupted\n"
 
     def run_direct_command(self, text):
-        execute_content = self.direct_command(text)
-        if execute_content:
-            self._write_to_file(self.CACHE_FILE_PATH, execute_content)
-            self.execute()
+        with self.metrics.line(text):
+            try:
+                with self.metrics.timer("evaluate"):
+                    return evaluate(text)
+            except NotConstantError:
+                pass  # the compiler knows more, and words the errors
+            execute_content = self.direct_command(text)
+            if execute_content:
+                return self.execute(execute_content, rollback=False)
 
     def process(self, block):
+        with self.metrics.line("\n".join(block.get_codes())):
+            return self._process(block)
+
+    def _process(self, block):
+        self.packages.add_used_stdlib(block)
         if block.is_func():
-            self.custom_methods.add(block)
+            with self.metrics.timer("parse"):
+                self.custom_methods.add(block)
         else:
-            self.cache_code(block)
+            with self.metrics.timer("parse"):
+                self.cache_code(block)
             try:
-                execute_content = self.prepare()
-                self._write_to_file(self.CACHE_FILE_PATH, execute_content)
-                return self.execute()
+                return self.execute(self.prepare())
             except NotDeclaredError:
-                print("parameter not declared")
+                self.errors += 1
+                self.output("parameter not declared")
                 self._rollback()
 
     def direct_command(self, command):
-        return self._template.replace(
-            "{%import_area%}", "\"fmt\""
-        ).replace(
-            "{%func_area%}", ""
-        ).replace(
-            "{%code_area%}", PRINTLN.format(command)
-        )
+        return self._template.render({
+            self.packages.template: "\"fmt\"",
+            self.codes.template: PRINTLN.format(command),
+        })
 
     def prepare(self):
-        self.custom_methods.scan_used(self.codes.blocks)
-        self.packages.scan_used(
-            self.codes.blocks + self.custom_methods.methods
-        )
+        with self.metrics.timer("scan"):
+            self.custom_methods.scan_used(self.codes.blocks)
+            self.packages.scan_used(
+                self.codes.blocks + self.custom_methods.methods
+            )
         if (
             self.codes.blocks and
             not self.assignment_manager.get_all_assigned()
         ):
             raise NotDeclaredError
-        return self._inflate()
+        with self.metrics.timer("render"):
+            return self._inflate()
 
     def _inflate(self):
-        return self.packages.inflate(
-            self.custom_methods.inflate(
-                self.codes.inflate(self._template)
-            )
-        )
+        return self._template.render(dict(
+            (handler.template, handler.section())
+            for handler in (self.packages, self.custom_methods, self.codes)
+        ))
 
     def _write_to_file(self, file_path, content):
         with open(file_path, "w") as f:
             f.write(content)
 
-    def execute(self):
-        out, err = subprocess.Popen(
-            ["go", "run", self.CACHE_FILE_PATH],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            stdin=subprocess.PIPE
-        ).communicate()
+    def _run_interruptible(self, coroutine):
+        import asyncio
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        task = self._loop.create_task(coroutine)
+        try:
+            self._loop.add_signal_handler(signal.SIGINT, task.cancel)
+            handle_sigint = True
+        except (NotImplementedError, ValueError, RuntimeError):
+            handle_sigint = False  # not the main thread, or no unix signals
+        try:
+            return self._loop.run_until_complete(task)
+        except KeyboardInterrupt:
+            task.cancel()
+            self._loop.run_until_complete(asyncio.wait([task]))
+            raise asyncio.CancelledError()
+        finally:
+            if handle_sigint:
+                self._loop.remove_signal_handler(signal.SIGINT)
+
+    def _emit_output(self, line):
+        self.output(line.decode("utf8", "replace").rstrip("\n"))
+
+    def is_deterministic(self, source):
+        # only the standard library is known, a package from elsewhere may
+        # read the clock or the disk
+        for package in self.packages.get_params():
+            if "." in package.split("/")[0] or any(
+                package == name or package.startswith(name + "/")
+                for name in NONDETERMINISTIC_PACKAGES
+            ):
+                return False
+        return not (
+            go_statement_re.search(source) or stdin_read_re.search(source)
+        )
 
+    def execute(self, source, rollback=True):
+        import asyncio
+        key = None
+        if self.output_cache.enabled and self.is_deterministic(source):
+            key = self.output_cache.key(source)
+            lines = self.output_cache.get(key)
+            if lines is not None:
+                self.assignment_manager.clear()
+                return self._parse_output(self._replay(lines), b"", rollback)
+        sent = list()
+
+        def send(line):
+            if key or not self.stream:
+                sent.append(line)
+            if self.stream:
+                self._emit_output(line)
+        output = OutputLimiter(send, self.output_head, self.output_tail)
+        try:
+            _, err = self._run_interruptible(self.backend.run(
+                source, self.workspace.SOURCE_NAME,
+                self.timeout, output, priority=self.priority,
+                stderr=OutputLimiter(None, ERROR_HEAD_LINES, ERROR_TAIL_LINES)
+            ))
+        except asyncio.CancelledError:
+            err = b"interrupted\n"
+        output.close()
+        if key and not err:
+            self.output_cache.put(key, sent)
         self.assignment_manager.clear()
-        return self._parse_output(out, err)
+        return self._parse_output(
+            b"" if self.stream else b"".join(sent), err, rollback
+        )
+
+    def _replay(self, lines):
+        if not self.stream:
+            return b"".join(lines)
+        for line in lines:
+            self._emit_output(line)
+        return b""
+
+    def run_source(self, source, timeout=None):
+        import asyncio
+        try:
+            return self._run_interruptible(self.backend.run(
+                source, self.workspace.SOURCE_NAME, timeout,
+                priority=self.priority
+            ))
+        except asyncio.CancelledError:
+            return b"", b"interrupted\n"
 
     def _parse_err_message(self, err):
         err = err.decode("utf8").strip()
         messages = err.split("\n")
         if len(messages) == 2:
             error_reason, detail = messages
+            result = error_detail_re.search(detail)
             return "\n".join(
-                [error_reason, error_detail_re.search(detail).group("detail")]
+                [error_reason, result.group("detail") if result else detail]
             )
         else:
             return messages[0]
@@ -127,9 +417,11 @@ class Console(Cmd):
     def _rollback(self):
         self.codes.rollback()
 
-    def _parse_output(self, out, err):
+    def _parse_output(self, out, err, rollback=True):
         if err:
-            self._rollback()
+            self.errors += 1
+            if rollback:  # a direct command added no code to take back
+                self._rollback()
             return self._parse_err_message(err)
         if out:
             return out.decode("utf8").rstrip()
@@ -140,4 +432,26 @@ class Console(Cmd):
 
     def _cache_import(self, code):
         package = code.strip(' ,')
-        self.packages.add(package)
+        try:
+            self.packages.import_package(package)
+        except UnknownPackageError as e:
+            self.errors += 1
+            return str(e)
+
+    def close(self):
+        if self._playground is not None:
+            self._playground.close()
+            self._playground = None
+        if self._backend is not None:
+            self._backend.close()
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
+
+    def do_exit(self, *args):
+        if self.autosave and (
+            self.codes.history or self.custom_methods.get_declared()
+        ):
+            self.do_save()
+        self.close()
+        super(Console, self).do_exit(*args)
@@ -14,3 +14,64 @@ func main() {
 {%code_area%}
 }
 """
+
+# the keys of backends.BACKENDS, listed here so parsing the command line
+# doesn't import the backends
+BACKEND_NAMES = ("build", "direct")
+
+BUILD_CACHE_DIR = "~/.cache/gonsole/build"
+BUILD_CACHE_SIZE = 256 * 1024 * 1024
+
+IMPORTCFG_CACHE_DIR = "~/.cache/gonsole/importcfg"
+# one index of the standard packages per Go toolchain
+STDLIB_INDEX_DIR = "~/.cache/gonsole/stdlib"
+# what was typed, saved on exit and loaded again by a bare ``load``
+AUTOSAVE_FILE = "~/.cache/gonsole/session.json"
+SESSION_FILE_VERSION = 1
+
+EXECUTE_TIMEOUT = 10
+
+OUTPUT_HEAD_LINES = 1000
+OUTPUT_TAIL_LINES = 100
+OUTPUT_MAX_LINE = 64 * 1024
+# stderr of a line, only its first lines are ever shown
+ERROR_HEAD_LINES = 20
+ERROR_TAIL_LINES = 10
+
+# what programs that can only print one thing printed, kept in memory
+OUTPUT_CACHE_SIZE = 16 * 1024 * 1024
+# a program using any of these, or their subpackages, may print something
+# else next time
+NONDETERMINISTIC_PACKAGES = (
+    "time", "math/rand", "crypto/rand", "os", "net", "io", "runtime",
+    "sync", "syscall", "unsafe", "plugin"
+)
+
+# go builds in directories on tmpfs when there is one
+WORKSPACE_ROOTS = ("/dev/shm",)
+
+# printed to stdout and stderr after every line of a script run as one program
+SCRIPT_SENTINEL = "<<gonsole-script-line:7d41a2>>"
+SCRIPT_SENTINEL_CODE = 'fmt.Print("{0}"); print("{0}")'.format(SCRIPT_SENTINEL)
+
+SERVER_PORT = 8700
+SERVER_MAX_SESSIONS = 500
+SERVER_IDLE_TIMEOUT = 30 * 60
+# lines waiting for a compile slot before requests are turned away
+SERVER_MAX_QUEUE = 200
+
+# compile pool priorities, lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+PRIORITY_WARM_UP = 20
+
+# compiled in the background at startup so the first line compiles warm
+WARM_UP_PACKAGES = (
+    "fmt", "strings", "strconv", "math", "sort", "errors", "bytes", "time",
+    "os", "unicode/utf8"
+)
+
+PLAYGROUND_URL = "https://play.golang.org"
+PLAYGROUND_CACHE_FILE = "~/.cache/gonsole/playground.json"
+PLAYGROUND_TIMEOUT = 10
+PLAYGROUND_RETRIES = 2
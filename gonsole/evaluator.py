@@ -0,0 +1,394 @@
+# coding: utf8
+"""Evaluate direct commands that are Go untyped constant expressions.
+
+Integer, float, rune, string and boolean literals, parentheses and the
+unary and binary operators are understood, with exact arithmetic like the
+compiler's. Anything else, and anything the compiler would reject,
+raises NotConstantError so the line is compiled and the compiler reports
+the error.
+"""
+
+import re
+import sys
+import fractions
+
+from .utils import lazy_compile
+from .exceptions import NotConstantError
+
+# numeric kinds in the order an operation promotes them
+INT, RUNE, FLOAT, STRING, BOOL = range(5)
+
+# bits of an untyped integer constant before the compiler gives up
+INT_PRECISION = 512
+# past this a rational float may be rounded by the compiler, don't guess
+FLOAT_PRECISION = 4096
+MAX_EXPONENT = 1000
+MAX_SHIFT = 1023 - 1 + 52
+INT_BITS = 64 if sys.maxsize > 2 ** 32 else 32
+
+TOKEN_RE = lazy_compile(r"""
+    (?P<space>\s+)
+  | (?P<number>\.?\d(?:[\w.]|(?<=[eEpP])[+-])*)
+  | (?P<rune>'(?:[^'\\\n]|\\.)*')
+  | (?P<string>"(?:[^"\\\n]|\\.)*")
+  | (?P<raw>`[^`]*`)
+  | (?P<name>[^\W\d]\w*)
+  | (?P<op>&&|\|\||<<|>>|&\^|==|!=|<=|>=|[-+*/%&|^<>!(),])
+""", re.X | re.S)
+
+DIGITS = r"\d(?:_?\d)*"
+HEX_DIGITS = r"[0-9a-fA-F](?:_?[0-9a-fA-F])*"
+INT_RE = lazy_compile(r"""
+    (?P<decimal>0|[1-9](?:_?\d)*)$
+  | 0[bB](?P<binary>(?:_?[01])+)$
+  | 0[oO]?(?P<octal>(?:_?[0-7])+)$
+  | 0[xX](?P<hex>(?:_?[0-9a-fA-F])+)$
+""", re.X)
+FLOAT_RE = lazy_compile(r"""
+    (?P<whole>{0})?(?:\.(?P<fraction>{0})?)?(?:[eE](?P<exponent>[+-]?{0}))?$
+""".format(DIGITS), re.X)
+HEX_FLOAT_RE = lazy_compile(r"""
+    0[xX]_?(?P<whole>{0})?(?:\.(?P<fraction>{0})?)?[pP](?P<exponent>[+-]?{1})$
+""".format(HEX_DIGITS, DIGITS), re.X)
+ESCAPE_RE = lazy_compile(r"""
+    \\(?:
+        (?P<simple>[abfnrtv\\'"])
+      | (?P<octal>[0-7]{3})
+      | x(?P<hex>[0-9a-fA-F]{2})
+      | u(?P<unicode>[0-9a-fA-F]{4})
+      | U(?P<wide>[0-9a-fA-F]{8})
+    )
+  | (?P<char>[^\\])
+""", re.X | re.S)
+
+SIMPLE_ESCAPES = {
+    "a": 7, "b": 8, "f": 12, "n": 10, "r": 13, "t": 9, "v": 11,
+    "\\": 92, "'": 39, '"': 34,
+}
+
+BINARY_PRECEDENCE = {
+    "||": 1,
+    "&&": 2,
+    "==": 3, "!=": 3, "<": 3, "<=": 3, ">": 3, ">=": 3,
+    "+": 4, "-": 4, "|": 4, "^": 4,
+    "*": 5, "/": 5, "%": 5, "<<": 5, ">>": 5, "&": 5, "&^": 5,
+}
+UNARY_OPERATORS = frozenset(["+", "-", "^", "!"])
+# the program a direct command runs in declares nothing to shadow these
+PREDECLARED = {"true": (BOOL, True), "false": (BOOL, False)}
+COMPARISONS = {
+    "==": lambda x, y: x == y,
+    "!=": lambda x, y: x != y,
+    "<": lambda x, y: x < y,
+    "<=": lambda x, y: x <= y,
+    ">": lambda x, y: x > y,
+    ">=": lambda x, y: x >= y,
+}
+
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = TOKEN_RE.match(text, position)
+        if not match:
+            raise NotConstantError(text[position:])
+        position = match.end()
+        if match.lastgroup != "space":
+            tokens.append((match.lastgroup, match.group()))
+    return tokens
+
+
+def _escapes(body, quote):
+    # yield a byte value for \x and octal escapes, a code point otherwise
+    position = 0
+    while position < len(body):
+        match = ESCAPE_RE.match(body, position)
+        if not match:
+            raise NotConstantError(body[position:])
+        position = match.end()
+        if match.group("char") is not None:
+            yield False, ord(match.group("char"))
+        elif match.group("simple"):
+            simple = match.group("simple")
+            if simple in "'\"" and simple != quote:
+                raise NotConstantError(match.group())
+            yield False, SIMPLE_ESCAPES[simple]
+        elif match.group("octal") or match.group("hex"):
+            value = (
+                int(match.group("octal"), 8) if match.group("octal")
+                else int(match.group("hex"), 16)
+            )
+            if value > 255:
+                raise NotConstantError(match.group())
+            yield True, value
+        else:
+            value = int(match.group("unicode") or match.group("wide"), 16)
+            if value > 0x10ffff or 0xd800 <= value <= 0xdfff:
+                raise NotConstantError(match.group())
+            yield False, value
+
+
+def _rune(literal):
+    values = list(_escapes(literal[1:-1], "'"))
+    if len(values) != 1:
+        raise NotConstantError(literal)
+    return RUNE, values[0][1]
+
+
+def _string(literal):
+    value = bytearray()
+    for is_byte, code in _escapes(literal[1:-1], '"'):
+        value.extend([code] if is_byte else chr(code).encode("utf8"))
+    return STRING, bytes(value)
+
+
+def _number(literal):
+    match = INT_RE.match(literal)
+    if match:
+        base = {"decimal": 10, "binary": 2, "octal": 8, "hex": 16}
+        return INT, int(match.group(match.lastgroup).replace("_", ""),
+                        base[match.lastgroup])
+    match = FLOAT_RE.match(literal)
+    radix = 10
+    if not match or not (match.group("whole") or match.group("fraction")) or (
+        "." not in literal and match.group("exponent") is None
+    ):
+        match = HEX_FLOAT_RE.match(literal)
+        radix = 16
+    if not match or not (match.group("whole") or match.group("fraction")):
+        raise NotConstantError(literal)
+    whole = (match.group("whole") or "").replace("_", "")
+    fraction = (match.group("fraction") or "").replace("_", "")
+    exponent = int((match.group("exponent") or "0").replace("_", ""))
+    if abs(exponent) > MAX_EXPONENT * (4 if radix == 16 else 1):
+        raise NotConstantError(literal)
+    value = fractions.Fraction(
+        int(whole + fraction, radix), radix ** len(fraction)
+    )
+    value *= fractions.Fraction(2 if radix == 16 else 10) ** exponent
+    return FLOAT, _checked(FLOAT, value)
+
+
+def _checked(kind, value):
+    if kind in (INT, RUNE) and value.bit_length() > INT_PRECISION:
+        raise NotConstantError("constant overflow")
+    if kind == FLOAT and (
+        value.numerator.bit_length() > FLOAT_PRECISION or
+        value.denominator.bit_length() > FLOAT_PRECISION
+    ):
+        raise NotConstantError("constant too precise")
+    return value
+
+
+def _integer(kind, value):
+    # an integer valued float constant may be used as an integer
+    if kind in (INT, RUNE):
+        return value
+    if kind == FLOAT and value.denominator == 1:
+        return value.numerator
+    raise NotConstantError("not an integer")
+
+
+def _unary(op, operand):
+    kind, value = operand
+    if op == "!":
+        if kind != BOOL:
+            raise NotConstantError(op)
+        return BOOL, not value
+    if kind not in (INT, RUNE, FLOAT) or (op == "^" and kind == FLOAT):
+        raise NotConstantError(op)
+    if op == "-":
+        value = -value
+    elif op == "^":
+        value = ~value  # untyped constants have no width to mask to
+    return kind, value
+
+
+def _shift(op, x, y):
+    count = _integer(*y)
+    if count < 0 or count > MAX_SHIFT:
+        raise NotConstantError(op)
+    kind = INT if x[0] == FLOAT else x[0]
+    value = _integer(*x)
+    value = value << count if op == "<<" else value >> count
+    return kind, _checked(kind, value)
+
+
+def _divide(kind, x, y):
+    if not y:
+        raise NotConstantError("division by zero")
+    if kind == FLOAT:
+        return x / y
+    quotient = abs(x) // abs(y)  # truncated towards zero
+    return quotient if (x < 0) == (y < 0) else -quotient
+
+
+def _remainder(x, y):
+    if not y:
+        raise NotConstantError("division by zero")
+    remainder = abs(x) % abs(y)
+    return -remainder if x < 0 else remainder
+
+
+def _binary(op, x, y):
+    if op in ("<<", ">>"):
+        return _shift(op, x, y)
+    (x_kind, x_value), (y_kind, y_value) = x, y
+    if op in ("&&", "||"):
+        if x_kind != BOOL or y_kind != BOOL:
+            raise NotConstantError(op)
+        return BOOL, x_value and y_value if op == "&&" else x_value or y_value
+    if BOOL in (x_kind, y_kind) or STRING in (x_kind, y_kind):
+        allowed = ("==", "!=") if x_kind == BOOL else (
+            ("+",) + tuple(COMPARISONS)
+        )
+        if x_kind != y_kind or op not in allowed:
+            raise NotConstantError(op)
+        if op in COMPARISONS:
+            return BOOL, COMPARISONS[op](x_value, y_value)
+        return STRING, x_value + y_value
+
+    kind = max(x_kind, y_kind)
+    if kind == FLOAT:
+        x_value = fractions.Fraction(x_value)
+        y_value = fractions.Fraction(y_value)
+    if op in COMPARISONS:
+        return BOOL, COMPARISONS[op](x_value, y_value)
+    if op == "+":
+        value = x_value + y_value
+    elif op == "-":
+        value = x_value - y_value
+    elif op == "*":
+        value = x_value * y_value
+    elif op == "/":
+        value = _divide(kind, x_value, y_value)
+    elif kind == FLOAT:
+        raise NotConstantError(op)  # the rest take integers only
+    elif op == "%":
+        value = _remainder(x_value, y_value)
+    elif op == "&":
+        value = x_value & y_value
+    elif op == "|":
+        value = x_value | y_value
+    elif op == "^":
+        value = x_value ^ y_value
+    else:
+        value = x_value & ~y_value
+    return kind, _checked(kind, value)
+
+
+class Parser(object):
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None, None
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def expect(self, text):
+        if self.take()[1] != text:
+            raise NotConstantError("expected " + text)
+
+    def expression_list(self):
+        values = [self.expression()]
+        while self.peek()[1] == ",":
+            self.take()
+            values.append(self.expression())
+        if self.position != len(self.tokens):
+            raise NotConstantError(self.peek()[1])
+        return values
+
+    def expression(self, precedence=1):
+        value = self.unary()
+        while True:
+            kind, text = self.peek()
+            current = BINARY_PRECEDENCE.get(text) if kind == "op" else None
+            if current is None or current < precedence:
+                return value
+            self.take()
+            value = _binary(text, value, self.expression(current + 1))
+
+    def unary(self):
+        kind, text = self.take()
+        if kind == "op" and text in UNARY_OPERATORS:
+            return _unary(text, self.unary())
+        if text == "(":
+            value = self.expression()
+            self.expect(")")
+            return value
+        if kind == "number":
+            return _number(text)
+        if kind == "rune":
+            return _rune(text)
+        if kind == "string":
+            return _string(text)
+        if kind == "name" and text in PREDECLARED:
+            return PREDECLARED[text]
+        if kind == "raw":
+            return STRING, text[1:-1].replace("\r", "").encode("utf8")
+        raise NotConstantError(text or "end of line")
+
+
+def _format_float(value):
+    # fmt's %v for float64: the shortest digits, %e for exponents
+    # below -4 or from 6
+    try:
+        number = float(value)
+    except OverflowError:
+        raise NotConstantError("constant overflows float64")
+    if number in (float("inf"), float("-inf")):
+        raise NotConstantError("constant overflows float64")
+    if number == 0:
+        return "0"
+    sign = "-" if number < 0 else ""
+    mantissa, _, exponent = repr(abs(number)).partition("e")
+    whole, _, fraction = mantissa.partition(".")
+    digits = whole + fraction
+    point = len(whole) + int(exponent or 0)
+    stripped = digits.lstrip("0")
+    point -= len(digits) - len(stripped)
+    digits = stripped.rstrip("0")
+    exponent = point - 1
+    if exponent < -4 or exponent >= 6:
+        mantissa = digits[0] + ("." + digits[1:] if len(digits) > 1 else "")
+        return "{0}{1}e{2}{3:02d}".format(
+            sign, mantissa, "-" if exponent < 0 else "+", abs(exponent)
+        )
+    if point <= 0:
+        return "{0}0.{1}{2}".format(sign, "0" * -point, digits)
+    if point >= len(digits):
+        return sign + digits + "0" * (point - len(digits))
+    return "{0}{1}.{2}".format(sign, digits[:point], digits[point:])
+
+
+def _format(kind, value):
+    # fmt.Println converts each constant to its default type first
+    if kind in (INT, RUNE):
+        bits = INT_BITS if kind == INT else 32
+        if not -2 ** (bits - 1) <= value < 2 ** (bits - 1):
+            raise NotConstantError("constant overflows int")
+        return str(value)
+    if kind == FLOAT:
+        return _format_float(value)
+    if kind == STRING:
+        try:
+            return value.decode("utf8")
+        except UnicodeDecodeError:
+            # go prints the bytes as they are, the compiler has to say it
+            raise NotConstantError("string is not valid UTF-8")
+    return "true" if value else "false"
+
+
+def evaluate(text):
+    """Return what ``fmt.Println(text)`` prints, without its newline."""
+    values = Parser(_tokenize(text)).expression_list()
+    return " ".join(_format(kind, value) for kind, value in values)
@@ -3,3 +3,23 @@
 
 class NotDeclaredError(Exception):
     pass
+
+
+class SessionLimitError(Exception):
+    pass
+
+
+class ServerBusyError(Exception):
+    pass
+
+
+class PlaygroundError(Exception):
+    pass
+
+
+class NotConstantError(Exception):
+    pass
+
+
+class UnknownPackageError(Exception):
+    pass
@@ -1,10 +1,96 @@
 # coding: utf8
 
+import sys
+import argparse
+
 from gonsole.console import Console
+from gonsole.script import run_script
+from gonsole.const import (
+    AUTOSAVE_FILE,
+    BACKEND_NAMES,
+    EXECUTE_TIMEOUT,
+    OUTPUT_HEAD_LINES,
+    OUTPUT_TAIL_LINES,
+    PLAYGROUND_URL,
+    WARM_UP_PACKAGES
+)
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(prog="gonsole")
+    parser.add_argument(
+        "--backend", choices=BACKEND_NAMES, default="build",
+        help="how each line is compiled and run"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=EXECUTE_TIMEOUT, metavar="SECONDS",
+        help="kill a program running longer than this, 0 to never kill"
+    )
+    parser.add_argument(
+        "--no-stream", dest="stream", action="store_false",
+        help="print a program's output only after it exits"
+    )
+    parser.add_argument(
+        "--output-head", type=int, default=OUTPUT_HEAD_LINES, metavar="N",
+        help="print at most the first N lines of a program's output"
+    )
+    parser.add_argument(
+        "--output-tail", type=int, default=OUTPUT_TAIL_LINES, metavar="N",
+        help="and the last N lines after the truncation notice"
+    )
+    parser.add_argument(
+        "--stats-log", metavar="FILE",
+        help="append per-line stage timings to FILE as JSON lines"
+    )
+    parser.add_argument(
+        "--workspace-root", metavar="DIR",
+        help="let go build under DIR (default: /dev/shm)"
+    )
+    parser.add_argument(
+        "--playground-url", default=PLAYGROUND_URL, metavar="URL",
+        help="share code with the Go playground at URL"
+    )
+    parser.add_argument(
+        "--warm-up-packages", default=",".join(WARM_UP_PACKAGES),
+        metavar="PKG,...",
+        help="standard packages to build in the background at startup"
+    )
+    parser.add_argument(
+        "--no-warm-up", dest="warm_up", action="store_false",
+        help="don't build anything in the background at startup"
+    )
+    parser.add_argument(
+        "--no-output-cache", dest="output_cache", action="store_false",
+        help="run programs again even when they can only print the same"
+    )
+    parser.add_argument(
+        "--no-autosave", dest="autosave", action="store_false",
+        help="don't save the session to {0} on exit".format(AUTOSAVE_FILE)
+    )
+    parser.add_argument(
+        "--script", metavar="FILE",
+        help="run the REPL lines in FILE (- for stdin) and exit"
+    )
+    return parser.parse_args(args)
 
 
 def execute():
-    Console().loop()
+    args = parse_args()
+    console = Console(
+        backend=args.backend, stats_log=args.stats_log, timeout=args.timeout,
+        stream=args.stream, output_head=args.output_head,
+        output_tail=args.output_tail, workspace_root=args.workspace_root,
+        playground_url=args.playground_url,
+        warm_up_packages=[
+            package for package in args.warm_up_packages.split(",") if package
+        ] if args.warm_up else None,
+        output_cache=args.output_cache,
+        # a script is saved already
+        autosave=AUTOSAVE_FILE if args.autosave and not args.script else None
+    )
+    if args.script:
+        sys.exit(run_script(console, args.script))
+    console.loop()
 
 
 if __name__ == '__main__':
@@ -1,74 +1,35 @@
 # coding: utf8
 
-import re
-import threading
+import bisect
 
 from . import utils
+from .session import Session
 
 
-class AssignmentManager:
-
-    _instance = None
-
-    _lock = threading.Lock()
-
-    def __init__(self):
-        self.assigned_params = dict()
-        self.declared_params = dict()
-
-    @classmethod
-    def instance(cls):
-        if not cls._instance:
-            with cls._lock:
-                if not cls._instance:
-                    cls._instance = AssignmentManager()
-        return cls._instance
-
-    def add_assigned(self, param, param_type):
-        self.assigned_params[param] = param_type
-
-    def add_declared(self, handler_type, name, codes):
-        self.declared_params[name] = (handler_type, codes)
-
-    def get_assigned(self, handler_type):
-        for assignment, _type in self.assigned_params.items():
-            if _type == handler_type:
-                yield assignment
-
-    def get_all_assigned(self):
-        return self.assigned_params.keys()
-
-    def get_all_declared(self):
-        return self.declared_params
-
-    def get_declared(self, assignment_type):
-        declareds = dict()
-        for name, value in self.declared_params.items():
-            if value[0] == assignment_type:
-                declareds[name] = value[1]
-        return declareds
-
-    def clear(self):
-        self.assigned_params.clear()
-
-    def length(self):
-        return len(self.assigned_params)
+MAJOR_VERSION_RE = utils.lazy_compile(r"v\d+$")
 
 
 class Handler(object):  # for compatibility to python 2.x
 
-    def __init__(self, template, handler_type):
+    _NOT_RENDERED = object()
+
+    def __init__(self, template, handler_type, session=None):
         self.handler_type = handler_type
         self.template = template
-        self.assignment_manager = AssignmentManager.instance()
+        self.session = session or Session()
+        self.assignment_manager = self.session.assignment_manager
+        self._section = None
+        self._section_key = self._NOT_RENDERED
 
     def scan(self, block):
-        for code in block.parse_to_codes():
-            for name in self.get_declared():
-                if self.is_assigned(name, code):
-                    self.assignment_manager.add_assigned(
-                        name, self.handler_type
-                    )
+        declared = self.get_declared()
+        for name in self.used_names(block):
+            if name in declared:
+                self.assignment_manager.add_assigned(name, self.handler_type)
+
+    def used_names(self, block):
+        # a set lookup per name, not a comparison per declaration
+        return block.get_names()
 
     def add(self, codes):
         raise NotImplementedError()
@@ -77,14 +38,18 @@ class Handler(object):  # for compatibility to python 2.x
         for block in blocks:
             self.scan(block)
 
-    def is_assigned(self, name, code):
-        raise NotImplementedError()
-
     def parse_codes(self):
         raise NotImplementedError()
 
-    def inflate(self, template):
-        return template.replace(self.template, self.parse_codes())
+    def section_key(self):
+        return self._NOT_RENDERED
+
+    def section(self):
+        key = self.section_key()
+        if key is self._NOT_RENDERED or key != self._section_key:
+            self._section = self.parse_codes()
+            self._section_key = key
+        return self._section
 
     def get_params(self):
         return self.assignment_manager.get_assigned(self.handler_type)
@@ -100,9 +65,15 @@ class PackageHandler(Handler):
 
     IMPORT_TEMPLATE = "{%import_area%}"
 
-    def __init__(self):
-        super(PackageHandler, self).__init__(self.IMPORT_TEMPLATE, "package")
+    def __init__(self, session=None, stdlib=None):
+        super(PackageHandler, self).__init__(
+            self.IMPORT_TEMPLATE, "package", session
+        )
+        # a StdlibIndex, to import what is used and check what is imported
+        self.stdlib = stdlib
 
+        # package name, the ``rand`` of ``math/rand``, to import paths
+        self._paths = dict()
         self._add_default_packages()
 
     def _add_default_packages(self):
@@ -112,12 +83,45 @@ class PackageHandler(Handler):
         package = package.strip('"')
         self.add_declared(package, package)
 
-    def used_package_length(self):
-        return self.assignment_manager.length()
+    def import_package(self, package):
+        package = package.strip('"')
+        if self.stdlib is not None:
+            self.stdlib.check(package)
+        self.add(package)
+
+    def add_used_stdlib(self, block):
+        """Import the standard packages the block selects from."""
+        if self.stdlib is None:
+            return
+        declared = self.assignment_manager.get_all_declared()
+        for token in block.get_token_set():
+            name, _, member = token.partition(".")
+            member = member.split(".")[0]
+            if (
+                not member[:1].isupper() or name in self._paths or
+                name in declared or name in block.get_bound_names()
+            ):
+                continue
+            package = self.stdlib.resolve(name, member)
+            if package:
+                self.add(package)
 
-    def is_assigned(self, name, code):
-        name = name.split('.')[-1]
-        return code.find(name) == 0
+    def add_declared(self, name, codes):
+        super(PackageHandler, self).add_declared(name, codes)
+        self._paths.setdefault(self.package_name(name), set()).add(name)
+
+    @staticmethod
+    def package_name(package):
+        elements = package.split("/")
+        # the module's major version is not part of the name
+        if len(elements) > 1 and MAJOR_VERSION_RE.match(elements[-1]):
+            elements.pop()
+        return elements[-1].split(".")[-1]
+
+    def used_names(self, block):
+        for name in block.get_names():
+            for package in self._paths.get(name, ()):
+                yield package
 
     def parse_codes(self):
         return "\n".join(
@@ -125,6 +129,9 @@ class PackageHandler(Handler):
             for name in self.get_params()
         )
 
+    def section_key(self):
+        return tuple(self.get_params())
+
     def _format(self, package):
         return utils.STANDARD_SPACE + '"' + package + '"'
 
@@ -132,14 +139,17 @@ class PackageHandler(Handler):
 class FunctionHandler(Handler):
 
     FUNC_TEMPLATE = "{%func_area%}"
-    METHOD_NAME_RE = re.compile("func (?P<method_name>\w+)\(")
+    METHOD_NAME_RE = utils.lazy_compile("func (?P<method_name>\w+)\(")
 
-    def __init__(self):
-        super(FunctionHandler, self).__init__(self.FUNC_TEMPLATE, "method")
+    def __init__(self, session=None):
+        super(FunctionHandler, self).__init__(
+            self.FUNC_TEMPLATE, "method", session
+        )
 
     @property
     def methods(self):
-        return [self.get_declared()[name] for name in self.get_params()]
+        declared = self.get_declared()
+        return [declared[name] for name in self.get_params()]
 
     def add(self, method):
         method_name = self._get_method_name(method)
@@ -151,81 +161,140 @@ class FunctionHandler(Handler):
     def parse_codes(self):
         return "\n\n".join(list(self._assemble()))
 
+    def section_key(self):
+        params = self.get_params()
+        return tuple(
+            method for name, method in self.get_declared().items()
+            if name in params
+        )
+
     def _assemble_method(self, method):
         return "\n".join(list(method.deflate()))
 
     def _assemble(self):
+        params = self.get_params()
         for name, method in self.get_declared().items():
-            if name in self.get_params():
+            if name in params:
                 yield self._assemble_method(method)
 
-    def is_assigned(self, method, code):
-        return code.find(method) == 0
-
 
 class CodeHandler(Handler):
 
     CODE_TEMPLATE = "{%code_area%}"
 
-    IS_ASSIGNMENT_RE = re.compile(r"(?P<vari>\w+)[ ]*:=[^=]+")
-    VARIABLE_DECLARE_RE = re.compile("(var|const) (?P<vari>\w+) ")
+    IS_ASSIGNMENT_RE = utils.lazy_compile(r"(?P<vari>\w+)[ ]*:=[^=]+")
+    VARIABLE_DECLARE_RE = utils.lazy_compile("(var|const) (?P<vari>\w+) ")
 
-    def __init__(self):
-        super(CodeHandler, self).__init__(self.CODE_TEMPLATE, "code")
+    def __init__(self, session=None):
+        super(CodeHandler, self).__init__(self.CODE_TEMPLATE, "code", session)
         self._pre_executed = None
         self._blocks = list()
         self._execute_blocks = list()
+        # def-use index, kept in step with self._blocks by add/rollback
+        self._positions = dict()
+        self._uses = list()
+        self._users = dict()
+        self._declarations = dict()
 
     @property
     def blocks(self):
         return self._execute_blocks
 
-    def _scan_for_execute(self):
-        scanned_varis = set()
+    def _used_identifiers(self, block):
+        return block.get_names()
 
-        def scan_used_codes(used_varis):
-            if not used_varis:
-                return
-            for vari in used_varis:
-                scanned_varis.add(vari)
-                self.scan(self.get_declared()[vari])
+    def _position(self, block):
+        position = self._positions.get(block)
+        if position is None and block in self._blocks:
+            return self._blocks.index(block)
+        return position
 
-            scan_used_codes(set(self.get_params()) - scanned_varis)
+    def _uses_of(self, block):
+        position = self._positions.get(block)
+        if position is None:
+            return self._used_identifiers(block)
+        return self._uses[position]
 
-        self.scan(self._pre_executed)
-        scan_used_codes(set(self.get_params()))
+    def _scan_for_execute(self):
+        declared = self.get_declared()
+        scanned_varis = set()
+        pending = [self._pre_executed]
+        while pending:
+            for vari in self._uses_of(pending.pop()):
+                if vari in declared and vari not in scanned_varis:
+                    scanned_varis.add(vari)
+                    self.assignment_manager.add_assigned(
+                        vari, self.handler_type
+                    )
+                    pending.append(declared[vari])
         self._execute_blocks = self._generate_execute_blocks()
 
     def get_last(self):
         return self._pre_executed
 
-    def add(self, block):
+    def _index(self, block):
+        position = len(self._blocks)
+        uses = self._used_identifiers(block)
         self._blocks.append(block)
+        self._positions[block] = position
+        self._uses.append(uses)
+        for identifier in uses:
+            self._users.setdefault(identifier, list()).append(position)
+
+    def _declare(self, block):
+        for vari in block.get_declared_varis():
+            self._declarations.setdefault(vari, list()).append(block)
+            self.add_declared(vari, block)
+
+    def add(self, block):
+        self._index(block)
         self._pre_executed = block
+        if block.is_declared():
+            self._declare(block)
+        else:
+            self._scan_for_execute()
 
-        def add_declareds(block):
-            [self.add_declared(vari, block)
-                for vari in block.get_declared_varis()]
+    @property
+    def history(self):
+        return list(self._blocks)
 
-        add_declareds(block) if block.is_declared() else self._scan_for_execute()
+    def restore(self, blocks):
+        # index a saved history in one pass, running none of it
+        for block in blocks:
+            self._index(block)
+            if block.is_declared():
+                self._declare(block)
+        self.clear()
 
     def rollback(self):
-        self._blocks.pop()
+        block = self._blocks.pop()
+        self._positions.pop(block, None)
+        for identifier in self._uses.pop():
+            users = self._users[identifier]
+            users.pop()
+            if not users:
+                del self._users[identifier]
+        if block.is_declared():
+            for vari in block.get_declared_varis():
+                declarations = self._declarations[vari]
+                declarations.pop()
+                if declarations:
+                    self.add_declared(vari, declarations[-1])
 
     def clear(self):
         self._pre_executed = None
         self._execute_blocks = list()
 
-    def get_varis(self, block):
-        return set(block.get_declared_varis())
-
-    def is_assigned(self, vari, code):
-        return code.find(vari) == 0
-
     def _generate_execute_blocks(self):
-        return [
-            block for block in self._blocks if self.need_compile(block)
-        ]
+        declared = self.get_declared()
+        positions = {self._position(self._pre_executed)}
+        for param in self.get_params():
+            declared_at = self._position(declared[param])
+            if declared_at is None:
+                continue
+            users = self._users.get(param, ())
+            positions.update(users[bisect.bisect_left(users, declared_at):])
+        return [self._blocks[position] for position in sorted(positions)]
 
     def _deflate_block(self, blocks):
         _blocks = list()
@@ -236,24 +305,5 @@ class CodeHandler(Handler):
     def parse_codes(self):
         return "\n".join(list(self._deflate_block(self.blocks)))
 
-    def get_propable_params(self, block):
-        for param in self.get_params():
-            index = self._blocks.index(self.get_declared()[param])
-            if index <= self._blocks.index(block):
-                yield param
-
-    def need_compile(self, block):
-        if block == self._pre_executed:
-            return True
-
-        params = list(self.get_propable_params(block))
-
-        def check_has_assigned_vari(code):
-            return any([
-                self.is_assigned(param, code)
-                for param in params
-            ])
-        return any([
-            check_has_assigned_vari(code)
-            for code in block.parse_to_codes()
-        ])
+    def section_key(self):
+        return tuple(self.blocks)
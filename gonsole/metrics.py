@@ -0,0 +1,99 @@
+# coding: utf8
+
+import json
+import math
+import time
+import threading
+import contextlib
+import collections
+
+
+class Histogram(object):
+
+    def __init__(self, unit="ms", max_samples=10000):
+        self.unit = unit
+        self.max_samples = max_samples
+        self.count = 0
+        self.max = 0
+        # percentiles are over the most recent samples
+        self._samples = collections.deque(maxlen=max_samples)
+
+    def add(self, value):
+        self.count += 1
+        self.max = max(self.max, value)
+        self._samples.append(value)
+
+    def percentile(self, percent):
+        if not self._samples:
+            return 0
+        samples = sorted(self._samples)
+        rank = int(math.ceil(percent / 100.0 * len(samples)))
+        return samples[max(rank, 1) - 1]
+
+
+class Metrics(object):
+
+    STAGES = (
+        "evaluate", "parse", "scan", "render", "wait", "compile",
+        "run", "total"
+    )
+
+    def __init__(self, log_path=None):
+        self.log_path = log_path
+        self.histograms = dict()
+        self._line = None
+        self._lock = threading.Lock()
+
+    def record(self, name, value, unit="ms"):
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram(unit)
+            self.histograms[name].add(value)
+            if self._line is not None:
+                self._line[name] = value
+
+    @contextlib.contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000)
+
+    def record_rusage(self, rusage):
+        self.record("run.cpu_user", rusage.ru_utime * 1000)
+        self.record("run.cpu_sys", rusage.ru_stime * 1000)
+        self.record("run.max_rss", rusage.ru_maxrss, unit="KB")
+
+    @contextlib.contextmanager
+    def line(self, text):
+        self._line = {"time": time.time(), "line": text}
+        try:
+            with self.timer("total"):
+                yield
+        finally:
+            line, self._line = self._line, None
+            if self.log_path:
+                with open(self.log_path, "a") as f:
+                    f.write(json.dumps(line, sort_keys=True) + "\n")
+
+    def _ordered_names(self):
+        names = [name for name in self.STAGES if name in self.histograms]
+        return names + sorted(set(self.histograms) - set(names))
+
+    def summary(self):
+        rows = ["{0:<14} {1:>6} {2:>10} {3:>10} {4:>10}".format(
+            "stage", "count", "p50", "p95", "max"
+        )]
+        for name in self._ordered_names():
+            histogram = self.histograms[name]
+            rows.append(
+                "{0:<14} {1:>6} {2:>10} {3:>10} {4:>10}".format(
+                    name, histogram.count,
+                    *["{0:.1f}{1}".format(value, histogram.unit) for value in (
+                        histogram.percentile(50), histogram.percentile(95),
+                        histogram.max
+                    )]
+                )
+            )
+        return "\n".join(rows)
@@ -0,0 +1,43 @@
+# coding: utf8
+
+import collections
+
+from .const import OUTPUT_HEAD_LINES, OUTPUT_TAIL_LINES
+
+
+class OutputLimiter(object):
+
+    def __init__(self, emit=None, head=OUTPUT_HEAD_LINES,
+                 tail=OUTPUT_TAIL_LINES):
+        self.head = head
+        self.truncated = 0
+        self._emit = emit
+        self._count = 0
+        self._lines = []
+        self._tail = collections.deque(maxlen=tail)
+
+    def _send(self, line):
+        if self._emit:
+            self._emit(line)
+        else:
+            self._lines.append(line)
+
+    def write(self, line):
+        self._count += 1
+        if self._count <= self.head:
+            self._send(line)
+            return
+        if len(self._tail) == self._tail.maxlen:
+            self.truncated += 1
+        self._tail.append(line)
+
+    def close(self):
+        if self.truncated:
+            notice = "... {0} lines truncated ...\n".format(self.truncated)
+            self._send(notice.encode("utf8"))
+            self.truncated = 0
+        while self._tail:
+            self._send(self._tail.popleft())
+
+    def getvalue(self):
+        return b"".join(self._lines)
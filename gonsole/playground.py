@@ -0,0 +1,100 @@
+# coding: utf8
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+import requests
+
+from .exceptions import PlaygroundError
+from .const import (
+    PLAYGROUND_URL,
+    PLAYGROUND_RETRIES,
+    PLAYGROUND_TIMEOUT,
+    PLAYGROUND_CACHE_FILE
+)
+
+
+class PlaygroundClient(object):
+
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+    RETRY_DELAY = 0.5
+
+    def __init__(self, url=PLAYGROUND_URL, cache_path=PLAYGROUND_CACHE_FILE,
+                 timeout=PLAYGROUND_TIMEOUT, retries=PLAYGROUND_RETRIES):
+        self.url = url.rstrip("/")
+        self.cache_path = cache_path and os.path.expanduser(cache_path)
+        self.timeout = timeout
+        self.retries = retries
+        # keeps the connection to the playground alive between shares
+        self.session = requests.Session()
+        self._shares = None
+        self._lock = threading.Lock()
+
+    def _key(self, source):
+        digest = hashlib.sha256(self.url.encode("utf8"))
+        digest.update(b"\0" + source.encode("utf8"))
+        return digest.hexdigest()
+
+    def _load(self):
+        if self._shares is None:
+            self._shares = dict()
+            if self.cache_path and os.path.exists(self.cache_path):
+                try:
+                    with open(self.cache_path) as f:
+                        self._shares = json.load(f)
+                except ValueError:
+                    pass  # a damaged cache is rebuilt by later shares
+        return self._shares
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        temp_path = "{0}.{1}.tmp".format(self.cache_path, os.getpid())
+        with open(temp_path, "w") as f:
+            json.dump(self._shares, f)
+        os.replace(temp_path, self.cache_path)
+
+    def _post(self, source):
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.RETRY_DELAY * 2 ** (attempt - 1))
+            try:
+                response = self.session.post(
+                    self.url + "/share", data=source.encode("utf8"),
+                    timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+                continue
+            if response.status_code in self.RETRY_STATUS:
+                error = "HTTP {0}".format(response.status_code)
+                continue
+            if response.status_code == 200 and response.text.strip():
+                return response.text.strip()
+            error = "HTTP {0}".format(response.status_code)
+            break
+        raise PlaygroundError("share failed: " + error)
+
+    def share_id(self, source):
+        key = self._key(source)
+        with self._lock:
+            shares = self._load()
+            if key in shares:
+                return shares[key]
+        share_id = self._post(source)
+        with self._lock:
+            self._load()[key] = share_id
+            self._save()
+        return share_id
+
+    def share(self, source):
+        return self.url + "/p/" + self.share_id(source)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,115 @@
+# coding: utf8
+
+import os
+import time
+import queue
+import itertools
+import threading
+import concurrent.futures
+
+from .metrics import Metrics
+from .const import PRIORITY_INTERACTIVE
+
+
+class CompilePool(object):
+    """Run builds from every session of the process on a few threads.
+
+    Lower priorities are taken first, a build already queued or running
+    for the same key is shared instead of started again.
+    """
+
+    _instance = None
+
+    _lock = threading.Lock()
+
+    def __init__(self, workers=None):
+        # read when the first build is submitted
+        self.workers = workers or os.cpu_count() or 1
+        self.metrics = Metrics()
+        self.deduplicated = 0
+        self.running = 0
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._inflight = dict()
+        self._mutex = threading.Lock()
+        self._threads = list()
+
+    @classmethod
+    def instance(cls):
+        if not cls._instance:
+            with cls._lock:
+                if not cls._instance:
+                    cls._instance = CompilePool()
+        return cls._instance
+
+    def _start(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._work, name="gonsole-compile", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, key, func, args=(), priority=PRIORITY_INTERACTIVE):
+        with self._mutex:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.deduplicated += 1
+                return future
+            future = concurrent.futures.Future()
+            self._inflight[key] = future
+            self._start()
+            self.metrics.record("queue.depth", self._queue.qsize(), "jobs")
+            self._queue.put((
+                priority, next(self._order), time.perf_counter(),
+                key, func, args, future
+            ))
+        return future
+
+    def _work(self):
+        while True:
+            _, _, queued, key, func, args, future = self._queue.get()
+            if func is None:
+                return
+            start = time.perf_counter()
+            self.metrics.record("queue.wait", (start - queued) * 1000)
+            if not future.set_running_or_notify_cancel():
+                with self._mutex:
+                    self._inflight.pop(key, None)
+                continue
+            with self._mutex:
+                self.running += 1
+            try:
+                result = func(*args)
+            except Exception as e:
+                self._finish(key)
+                future.set_exception(e)
+            else:
+                self._finish(key)
+                future.duration = time.perf_counter() - start
+                future.set_result(result)
+
+    def _finish(self, key):
+        with self._mutex:
+            self._inflight.pop(key, None)
+            self.running -= 1
+
+    def status(self):
+        wait = self.metrics.histograms.get("queue.wait")
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "running": self.running,
+            "deduplicated": self.deduplicated,
+            "wait_p50_ms": wait.percentile(50) if wait else 0,
+            "wait_p95_ms": wait.percentile(95) if wait else 0,
+        }
+
+    def shutdown(self):
+        with self._mutex:
+            threads, self._threads = self._threads, list()
+        for _ in threads:
+            self._queue.put((float("inf"), next(self._order), 0,
+                             None, None, (), None))
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,108 @@
+# coding: utf8
+
+import os
+import signal
+import asyncio
+import subprocess
+
+from .const import OUTPUT_MAX_LINE
+
+
+class ProcessResult(object):
+
+    def __init__(self, out, err, returncode, rusage=None):
+        self.out = out
+        self.err = err
+        self.returncode = returncode
+        self.rusage = rusage
+
+
+def kill_group(pid):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass  # already gone
+
+
+class _Collector(object):
+
+    def __init__(self):
+        self._lines = []
+
+    def write(self, line):
+        self._lines.append(line)
+
+    def getvalue(self):
+        return b"".join(self._lines)
+
+
+async def _pump(pipe, sink):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    transport, _ = await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), pipe
+    )
+    pending = b""
+    try:
+        while True:
+            chunk = await reader.read(OUTPUT_MAX_LINE)
+            if not chunk:
+                break
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                sink.write(line + b"\n")
+            if len(pending) >= OUTPUT_MAX_LINE:
+                sink.write(pending)
+                pending = b""
+        if pending:
+            sink.write(pending)
+    finally:
+        transport.close()
+
+
+async def run_process(args, timeout=None, stdout=None, stderr=None):
+    loop = asyncio.get_running_loop()
+    # a session of its own: a terminal Ctrl-C only reaches gonsole, which
+    # then kills this process group rather than dying itself
+    process = subprocess.Popen(
+        args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        stdin=subprocess.PIPE,
+        start_new_session=True
+    )
+    process.stdin.close()
+    out = _Collector() if stdout is None else stdout
+    # stderr is kept whole unless the caller bounds it, a script run finds
+    # its lines by the sentinels in it
+    err = _Collector() if stderr is None else stderr
+    finished = asyncio.gather(
+        _pump(process.stdout, out),
+        _pump(process.stderr, err),
+        # reap the child ourselves so its resource usage isn't thrown away
+        loop.run_in_executor(None, os.wait4, process.pid, 0)
+    )
+
+    timed_out = False
+    try:
+        await asyncio.wait_for(asyncio.shield(finished), timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+        kill_group(process.pid)
+    except asyncio.CancelledError:
+        kill_group(process.pid)
+        await finished
+        raise
+
+    _, _, (_, status, rusage) = await finished
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if stderr is not None:
+        stderr.close()
+    err = err.getvalue()
+    if timed_out:
+        err += "killed: timed out after {0}s\n".format(timeout).encode("utf8")
+    return ProcessResult(
+        out.getvalue() if stdout is None else b"", err,
+        process.returncode, rusage
+    )
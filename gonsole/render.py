@@ -0,0 +1,31 @@
+# coding: utf8
+
+import re
+
+
+SLOT_RE = re.compile(r"\{%\w+%\}")
+
+
+class Template(object):
+
+    def __init__(self, text):
+        self.text = text
+        self._parts = []
+        self._slots = []
+        position = 0
+        for match in SLOT_RE.finditer(text):
+            self._parts.append(text[position:match.start()])
+            self._slots.append((len(self._parts), match.group()))
+            self._parts.append("")
+            position = match.end()
+        self._parts.append(text[position:])
+
+    @property
+    def slots(self):
+        return [slot for _, slot in self._slots]
+
+    def render(self, sections):
+        parts = list(self._parts)
+        for index, slot in self._slots:
+            parts[index] = sections.get(slot, "")
+        return "".join(parts)
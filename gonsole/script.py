@@ -0,0 +1,238 @@
+# coding: utf8
+
+import sys
+
+from .block import Block
+from .const import (
+    PRINTLN,
+    PRIORITY_BATCH,
+    SCRIPT_SENTINEL,
+    SCRIPT_SENTINEL_CODE
+)
+from .output import OutputLimiter
+from .utils import inflate_space, lazy_compile
+
+
+compile_error_re = lazy_compile(r"\.go:(?P<line>\d+):\d+: ")
+
+
+class ScriptItem(object):
+
+    def __init__(self, text, block, direct=False):
+        self.text = text
+        self.block = block
+        self.direct = direct
+        self.done = False
+        self.failed = False
+        self.result = None
+
+
+class ScriptRunner(object):
+    """Run a transcript of REPL lines with as few compiles as possible.
+
+    Consecutive code lines are compiled into one program, each followed by
+    a sentinel on stdout and stderr so the output can be split back per
+    line. A line that fails to compile or run in that program is run the
+    interactive way instead, in its place, against the same session.
+    """
+
+    SENTINEL = SCRIPT_SENTINEL.encode("utf8")
+
+    def __init__(self, console):
+        self.console = console
+        self.compiles = 0
+        # lines that ran fine in a batch, replayed for their declarations
+        self._history = list()
+        self._pending = list()
+
+    def run(self, lines):
+        lines = iter(lines)
+
+        def next_line(iter_count=1):
+            return next(lines).strip()
+
+        self.console.read_multi_line = next_line
+        self.console.block_generator.continue_input = next_line
+        try:
+            for line in lines:
+                line = line.strip()
+                if line == "exit":
+                    break
+                if line:
+                    self.feed(line)
+        except StopIteration:
+            self.console.errors += 1
+            self.console.output("unexpected end of script")
+        self.flush()
+
+    def feed(self, line):
+        console = self.console
+        if console.DIRECT_COMMAND_RE.match(line):
+            block = Block(PRINTLN.format(line))
+            self._pending.append(ScriptItem(line, block, direct=True))
+            return
+        head = line.split()[0]
+        if head == "import":
+            # a declaration only, it doesn't need the lines before it run
+            self._output(console._run(line))
+        elif hasattr(console, "do_" + head):
+            self.flush()
+            self._output(console._run(line))
+        else:
+            block = console.block_generator.generate(line)
+            console.packages.add_used_stdlib(block)
+            if not block.is_func():
+                self._pending.append(ScriptItem(line, block))
+                return
+            methods = console.custom_methods
+            if methods._get_method_name(block) in methods.get_declared():
+                self.flush()  # lines before a redefinition use the old one
+            methods.add(block)
+
+    def flush(self):
+        items, self._pending = self._pending, list()
+        self._run_batch([item for item in items if self._batchable(item)])
+        for item in items:
+            if item.done:
+                self._remember(item)
+                self._output(item.result)
+            elif item.direct:
+                self._output(self.console.run_direct_command(item.text))
+            else:
+                self._output(self.console.process(item.block))
+
+    def _batchable(self, item):
+        # a direct command is compiled on its own, it mustn't see variables
+        return not item.direct or (
+            item.block.get_token_set() <= {"fmt.Println"}
+        )
+
+    def _remember(self, item):
+        if item.direct:
+            return
+        self.console.cache_code(item.block)
+        self.console.assignment_manager.clear()
+        self._history.append(item.block)
+
+    def _output(self, result):
+        if result:
+            self.console.output(result)
+
+    def _run_batch(self, items):
+        while True:
+            runnable = [item for item in items if not item.failed]
+            if all(item.done for item in runnable):
+                return
+            source, owners = self._assemble(runnable)
+            timeout = self.console.timeout
+            out, err = self.console.run_source(
+                source, timeout and timeout * len(runnable)
+            )
+            self.compiles += 1
+            outs = out.split(self.SENTINEL)
+            errs = err.split(self.SENTINEL)
+            if len(outs) == 1 and len(errs) == 1 and err:
+                failed = self._compile_failures(err, owners, runnable)
+            else:
+                failed = self._run_failures(outs, errs, runnable)
+            if failed is None or any(item.done for item in failed):
+                failed = runnable  # not caused by the new lines, give up
+            for item in failed:
+                if not item.done:
+                    item.failed = True
+
+    def _compile_failures(self, err, owners, runnable):
+        failed = list()
+        for line in compile_error_re.findall(err.decode("utf8", "replace")):
+            position = owners.get(int(line), -1) - len(self._history)
+            if position < 0:
+                return None
+            failed.append(runnable[position])
+        return failed or None
+
+    def _run_failures(self, outs, errs, runnable):
+        finished = min(len(outs), len(errs)) - 1
+        if finished < len(self._history):
+            return None
+        for position, item in enumerate(runnable):
+            index = len(self._history) + position
+            if index >= finished or errs[index]:
+                return [item]
+            if not item.done:
+                item.done = True
+                item.result = self._result(outs[index])
+        return list()
+
+    def _result(self, out):
+        console = self.console
+        output = OutputLimiter(None, console.output_head, console.output_tail)
+        for line in out.splitlines(True):
+            output.write(line)
+        output.close()
+        out = output.getvalue()
+        if out:
+            return out.decode("utf8").rstrip()
+
+    def _assemble(self, runnable):
+        console = self.console
+        blocks = self._history + [item.block for item in runnable]
+        manager = console.assignment_manager
+        try:
+            manager.add_assigned("fmt", console.packages.handler_type)
+            console.custom_methods.scan_used(blocks)
+            console.packages.scan_used(
+                blocks + console.custom_methods.methods
+            )
+            body, owners = self._body(blocks)
+            source = console._template.render({
+                console.packages.template: console.packages.section(),
+                console.custom_methods.template:
+                    console.custom_methods.section(),
+                console.codes.template: body,
+            })
+        finally:
+            manager.clear()
+        offset = source[:source.index(body)].count("\n")
+        return source, dict(
+            (line + offset, index) for line, index in owners.items()
+        )
+
+    def _body(self, blocks):
+        lines = list()
+        owners = dict()
+        depth = 1
+        scope = set()
+        for index, block in enumerate(blocks):
+            names = [
+                name for name in block.get_declared_varis() if name != "_"
+            ] if block.is_declared() else []
+            if scope.intersection(names):
+                # a redeclaration shadows the old one in a nested scope
+                lines.append(inflate_space("{", depth))
+                depth += 1
+                scope = set()
+            scope.update(names)
+            for code in block.deflate(depth):
+                lines.append(code)
+                owners[len(lines)] = index
+            if not block.codes[0].startswith("type "):
+                lines.extend(
+                    inflate_space("_ = " + name, depth) for name in names
+                )
+            lines.append(inflate_space(SCRIPT_SENTINEL_CODE, depth))
+        while depth > 1:
+            depth -= 1
+            lines.append(inflate_space("}", depth))
+        return "\n".join(lines), owners
+
+
+def run_script(console, path):
+    script = sys.stdin if path == "-" else open(path)
+    console.priority = PRIORITY_BATCH
+    try:
+        ScriptRunner(console).run(script)
+    finally:
+        if script is not sys.stdin:
+            script.close()
+        console.close()
+    return 1 if console.errors else 0
@@ -0,0 +1,318 @@
+# coding: utf8
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import functools
+import threading
+import concurrent.futures
+
+import tornado.web
+import tornado.ioloop
+import tornado.websocket
+
+from .pool import CompilePool
+from .console import Console
+from .exceptions import SessionLimitError, ServerBusyError
+from .const import (
+    BACKEND_NAMES,
+    EXECUTE_TIMEOUT,
+    SERVER_PORT,
+    SERVER_MAX_QUEUE,
+    SERVER_MAX_SESSIONS,
+    SERVER_IDLE_TIMEOUT
+)
+
+
+def create_console(**options):
+    return Console(stream=False, **options)
+
+
+class RemoteSession(object):
+
+    # writing files on the server or ending it is not for remote users
+    FORBIDDEN_COMMANDS = {"export", "exit", "save", "load"}
+
+    def __init__(self, console):
+        self.id = uuid.uuid4().hex
+        self.console = console
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+        self.closed = False
+        self._output = list()
+        console.output = self._write
+
+    def _write(self, message=""):
+        self._output.append(message)
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def run(self, text):
+        console = self.console
+        lines = iter(text.splitlines())
+
+        def next_line(iter_count=1):
+            return next(lines).strip()
+
+        console.read_multi_line = next_line
+        console.block_generator.continue_input = next_line
+        self._output = list()
+        try:
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.split()[0] in self.FORBIDDEN_COMMANDS:
+                    self._write("{0}: not available".format(line.split()[0]))
+                    continue
+                result = console.run_line(line)
+                if result:
+                    self._write(result)
+        except StopIteration:
+            self._write("incomplete input")
+        return "\n".join(self._output)
+
+    def close(self):
+        self.closed = True
+        self.console.close()
+
+
+class SessionManager(object):
+
+    def __init__(self, console_factory=create_console,
+                 max_sessions=SERVER_MAX_SESSIONS,
+                 idle_timeout=SERVER_IDLE_TIMEOUT,
+                 max_compiles=None, max_queue=SERVER_MAX_QUEUE):
+        self.console_factory = console_factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_compiles = max_compiles or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.sessions = dict()
+        self.pending = 0
+        self.running = 0
+        self._running_lock = threading.Lock()
+        # each worker runs one line at a time: the pool size is the number
+        # of go builds and programs allowed at once, the rest wait in line
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            self.max_compiles, thread_name_prefix="gonsole-session"
+        )
+
+    def create(self):
+        if len(self.sessions) >= self.max_sessions:
+            raise SessionLimitError()
+        session = RemoteSession(self.console_factory())
+        self.sessions[session.id] = session
+        return session
+
+    def get(self, session_id):
+        return self.sessions.get(session_id)
+
+    def close(self, session_id):
+        session = self.sessions.pop(session_id, None)
+        # a busy session is closed by the request running in it
+        if session and not session.lock.locked():
+            session.close()
+
+    def _run(self, session, text):
+        with self._running_lock:
+            self.running += 1
+        try:
+            return session.run(text)
+        finally:
+            with self._running_lock:
+                self.running -= 1
+
+    async def run(self, session, text):
+        if self.pending >= self.max_compiles + self.max_queue:
+            raise ServerBusyError()
+        self.pending += 1
+        try:
+            async with session.lock:
+                if session.closed:
+                    return ""
+                session.touch()
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self._run, session, text
+                )
+        finally:
+            self.pending -= 1
+            session.touch()
+            if (
+                session.id not in self.sessions and
+                not session.lock.locked() and not session.closed
+            ):
+                session.close()
+
+    def evict_idle(self):
+        deadline = time.monotonic() - self.idle_timeout
+        for session in list(self.sessions.values()):
+            if session.last_used < deadline and not session.lock.locked():
+                self.close(session.id)
+
+    def status(self):
+        return {
+            "sessions": len(self.sessions),
+            "running": self.running,
+            "queued": self.pending - self.running,
+            "max_compiles": self.max_compiles,
+            "compile_pool": CompilePool.instance().status(),
+        }
+
+    def shutdown(self):
+        for session_id in list(self.sessions):
+            self.close(session_id)
+        self._executor.shutdown(wait=False)
+
+
+class BaseHandler(tornado.web.RequestHandler):
+
+    def initialize(self, manager):
+        self.manager = manager
+
+    def write_error(self, status_code, **kwargs):
+        self.finish({"error": self._reason})
+
+    def _session(self, session_id):
+        session = self.manager.get(session_id)
+        if session is None:
+            raise tornado.web.HTTPError(404, reason="no such session")
+        return session
+
+
+class SessionsHandler(BaseHandler):
+
+    def post(self):
+        try:
+            session = self.manager.create()
+        except SessionLimitError:
+            raise tornado.web.HTTPError(503, reason="too many sessions")
+        self.set_status(201)
+        self.write({"session": session.id})
+
+
+class SessionHandler(BaseHandler):
+
+    def delete(self, session_id):
+        self._session(session_id)
+        self.manager.close(session_id)
+        self.set_status(204)
+
+
+class RunHandler(BaseHandler):
+
+    async def post(self, session_id):
+        session = self._session(session_id)
+        try:
+            code = json.loads(self.request.body)["code"]
+        except (ValueError, KeyError, TypeError):
+            raise tornado.web.HTTPError(400, reason="expected {\"code\": ...}")
+        try:
+            output = await self.manager.run(session, code)
+        except ServerBusyError:
+            raise tornado.web.HTTPError(503, reason="server busy")
+        self.write({"output": output})
+
+
+class StatusHandler(BaseHandler):
+
+    def get(self):
+        self.write(self.manager.status())
+
+
+class ReplSocket(tornado.websocket.WebSocketHandler):
+
+    def initialize(self, manager):
+        self.manager = manager
+        self.session = None
+
+    def open(self):
+        try:
+            self.session = self.manager.create()
+        except SessionLimitError:
+            self.close(1013, "too many sessions")
+            return
+        self.write_message({"session": self.session.id})
+
+    async def on_message(self, message):
+        try:
+            output = await self.manager.run(self.session, message)
+        except ServerBusyError:
+            self.write_message({"error": "server busy"})
+            return
+        self.write_message({"output": output})
+
+    def on_close(self):
+        if self.session is not None:
+            self.manager.close(self.session.id)
+
+
+def make_app(manager):
+    options = dict(manager=manager)
+    return tornado.web.Application([
+        (r"/sessions", SessionsHandler, options),
+        (r"/sessions/(\w+)", SessionHandler, options),
+        (r"/sessions/(\w+)/run", RunHandler, options),
+        (r"/status", StatusHandler, options),
+        (r"/ws", ReplSocket, options),
+    ])
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(prog="gonsole-server")
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--address", default="127.0.0.1")
+    parser.add_argument(
+        "--backend", choices=BACKEND_NAMES, default="build",
+        help="how each line is compiled and run"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=EXECUTE_TIMEOUT, metavar="SECONDS",
+        help="kill a program running longer than this, 0 to never kill"
+    )
+    parser.add_argument(
+        "--max-sessions", type=int, default=SERVER_MAX_SESSIONS, metavar="N",
+        help="refuse new sessions past N"
+    )
+    parser.add_argument(
+        "--idle-timeout", type=float, default=SERVER_IDLE_TIMEOUT,
+        metavar="SECONDS", help="close sessions unused for this long"
+    )
+    parser.add_argument(
+        "--max-compiles", type=int, metavar="N",
+        help="run at most N lines at once (default: number of cores)"
+    )
+    parser.add_argument(
+        "--max-queue", type=int, default=SERVER_MAX_QUEUE, metavar="N",
+        help="turn requests away when N lines are already waiting"
+    )
+    return parser.parse_args(args)
+
+
+def execute():
+    args = parse_args()
+    if args.max_compiles:
+        CompilePool.instance().workers = args.max_compiles
+    manager = SessionManager(
+        functools.partial(
+            create_console, backend=args.backend, timeout=args.timeout
+        ),
+        max_sessions=args.max_sessions, idle_timeout=args.idle_timeout,
+        max_compiles=args.max_compiles, max_queue=args.max_queue
+    )
+    make_app(manager).listen(args.port, args.address)
+    tornado.ioloop.PeriodicCallback(
+        manager.evict_idle, min(args.idle_timeout, 60) * 1000
+    ).start()
+    try:
+        tornado.ioloop.IOLoop.current().start()
+    finally:
+        manager.shutdown()
+
+
+if __name__ == '__main__':
+    execute()
@@ -0,0 +1,59 @@
+# coding: utf8
+
+
+class AssignmentManager(object):
+
+    def __init__(self):
+        self.assigned_params = dict()
+        self.declared_params = dict()
+        # the same names indexed by handler type
+        self._assigned = dict()
+        self._declared = dict()
+
+    def add_assigned(self, param, param_type):
+        previous = self.assigned_params.get(param)
+        if previous is not None and previous != param_type:
+            self._assigned[previous].pop(param, None)
+        self.assigned_params[param] = param_type
+        self._assigned.setdefault(param_type, dict())[param] = True
+
+    def add_declared(self, handler_type, name, codes):
+        previous = self.declared_params.get(name)
+        if previous is not None and previous[0] != handler_type:
+            self._declared[previous[0]].pop(name, None)
+        self.declared_params[name] = (handler_type, codes)
+        self._declared.setdefault(handler_type, dict())[name] = codes
+
+    def get_assigned(self, handler_type):
+        return self._assigned.setdefault(handler_type, dict()).keys()
+
+    def get_all_assigned(self):
+        return self.assigned_params.keys()
+
+    def get_all_declared(self):
+        return self.declared_params
+
+    def get_declared(self, assignment_type):
+        return self._declared.setdefault(assignment_type, dict())
+
+    def clear(self):
+        self.assigned_params.clear()
+        for assigned in self._assigned.values():
+            assigned.clear()
+
+    def clear_declared(self):
+        self.declared_params.clear()
+        for declared in self._declared.values():
+            declared.clear()
+
+    def length(self):
+        return len(self.assigned_params)
+
+
+
+class Session(object):
+
+    def __init__(self):
+        # names declared in and used by this session's code, shared by its
+        # package, function and code handlers
+        self.assignment_manager = AssignmentManager()
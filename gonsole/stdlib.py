@@ -0,0 +1,132 @@
+# coding: utf8
+
+import os
+import re
+import json
+import threading
+import subprocess
+
+from .const import STDLIB_INDEX_DIR
+from .toolchain import Toolchain
+from .utils import lazy_compile
+from .exceptions import UnknownPackageError
+
+
+# go doc -short indents constructors under their type, methods start
+# with a receiver instead of a name
+EXPORT_RE = lazy_compile(
+    r"^\s*(?:func|type|var|const) (?P<name>[A-Z]\w*)", re.M
+)
+
+
+class StdlibIndex(object):
+    """The standard packages and what they export, without the compiler.
+
+    Listed by the toolchain once per Go version and kept on disk; the
+    exported names of a package are only looked up the first time they
+    are needed.
+    """
+
+    _instance = None
+
+    _lock = threading.Lock()
+
+    def __init__(self, toolchain, root=STDLIB_INDEX_DIR):
+        self.toolchain = toolchain
+        self.root = os.path.expanduser(root)
+        self._packages = None
+        self._names = None
+        self._mutex = threading.RLock()
+
+    @classmethod
+    def instance(cls):
+        if not cls._instance:
+            with cls._lock:
+                if not cls._instance:
+                    cls._instance = StdlibIndex(Toolchain.instance())
+        return cls._instance
+
+    def _path(self):
+        return os.path.join(self.root, self.toolchain.fingerprint + ".json")
+
+    def _read(self):
+        try:
+            with open(self._path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None  # not built yet for this toolchain, or damaged
+
+    def _save(self):
+        path = self._path()
+        temp_path = "{0}.{1}.tmp".format(path, os.getpid())
+        try:
+            if not os.path.exists(self.root):
+                os.makedirs(self.root)
+            with open(temp_path, "w") as f:
+                json.dump(self._packages, f)
+            os.replace(temp_path, path)
+        except OSError:
+            pass  # listed again by the next process
+
+    def load(self):
+        with self._mutex:
+            if self._packages is None:
+                try:
+                    self._packages = self._read()
+                    if self._packages is None:
+                        self._packages = dict(
+                            (path, {"name": name, "exports": None})
+                            for path, name in self.toolchain.list_std()
+                        )
+                        self._save()
+                except (OSError, subprocess.CalledProcessError):
+                    self._packages = dict()  # no go, nothing is checked
+                self._names = dict()
+                for path, package in self._packages.items():
+                    self._names.setdefault(package["name"], []).append(path)
+            return self._packages
+
+    @property
+    def available(self):
+        return bool(self.load())
+
+    def __contains__(self, path):
+        return path in self.load()
+
+    def paths(self, name):
+        self.load()
+        return sorted(self._names.get(name, ()))
+
+    def exports(self, path):
+        with self._mutex:
+            package = self.load()[path]
+            if package["exports"] is None:
+                try:
+                    doc = self.toolchain.doc(path)
+                except (OSError, subprocess.CalledProcessError):
+                    return ()
+                package["exports"] = sorted(set(
+                    match.group("name") for match in EXPORT_RE.finditer(doc)
+                ))
+                self._save()
+            return package["exports"]
+
+    def resolve(self, name, member):
+        # the package a selector like rand.Intn refers to, if only one fits
+        paths = self.paths(name)
+        if len(paths) > 1:
+            paths = [path for path in paths if member in self.exports(path)]
+        return paths[0] if len(paths) == 1 else None
+
+    def check(self, path):
+        # a path outside the standard library is some module's, not a typo
+        if "." in path.split("/")[0] or path in self or not self.available:
+            return
+        import difflib
+        message = "package {0} is not in std".format(path)
+        matches = difflib.get_close_matches(path, list(self.load()), n=3)
+        if matches:
+            message += ", did you mean {0}?".format(
+                " or ".join('"{0}"'.format(match) for match in matches)
+            )
+        raise UnknownPackageError(message)
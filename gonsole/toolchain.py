@@ -0,0 +1,230 @@
+# coding: utf8
+
+import os
+import re
+import json
+import hashlib
+import subprocess
+import threading
+
+from .const import IMPORTCFG_CACHE_DIR
+from .utils import lazy_compile
+
+
+class Toolchain(object):
+
+    FINGERPRINT_ENV = (
+        "GOROOT", "GOOS", "GOARCH", "GOAMD64", "GOARM", "GO386",
+        "CGO_ENABLED", "GOFLAGS", "GOEXPERIMENT"
+    )
+
+    _instance = None
+
+    _lock = threading.Lock()
+
+    def __init__(self, go="go", environ=None):
+        self.go = go
+        self.environ = dict(environ or {})
+        self._fingerprint = None
+
+    @classmethod
+    def instance(cls):
+        if not cls._instance:
+            with cls._lock:
+                if not cls._instance:
+                    cls._instance = Toolchain()
+        return cls._instance
+
+    def subprocess_env(self, environ=None):
+        # environ is what one session adds, such as where its builds go
+        if not self.environ and not environ:
+            return None
+        return dict(os.environ, **dict(self.environ, **(environ or {})))
+
+    def _output(self, *args):
+        return subprocess.check_output(
+            (self.go,) + args, env=self.subprocess_env()
+        ).decode("utf8")
+
+    def version(self):
+        return self._output("version").strip()
+
+    def env(self):
+        return json.loads(self._output("env", "-json"))
+
+    def list_std(self):
+        # (import path, package name) of the importable standard packages
+        for line in self._output(
+            "list", "-f", "{{.ImportPath}} {{.Name}}", "std"
+        ).splitlines():
+            path, name = line.split()
+            elements = path.split("/")
+            if "internal" not in elements and elements[0] != "vendor":
+                yield path, name
+
+    def doc(self, package):
+        return self._output("doc", "-short", package)
+
+    @property
+    def fingerprint(self):
+        if self._fingerprint is None:
+            env = self.env()
+            digest = hashlib.sha256(self.version().encode("utf8"))
+            for name in self.FINGERPRINT_ENV:
+                digest.update(
+                    "\0{0}={1}".format(name, env.get(name, "")).encode("utf8")
+                )
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def build(self, source_path, output_path, environ=None):
+        process = subprocess.Popen(
+            [self.go, "build", "-o", output_path, source_path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env=self.subprocess_env(environ),
+            start_new_session=True
+        )
+        out, _ = process.communicate()
+        return process.returncode, out
+
+    def compile_packages(self, packages, environ=None):
+        # more than one package and no -o: compiled into go's build cache
+        # and never linked
+        process = subprocess.Popen(
+            [self.go, "build"] + list(packages),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env=self.subprocess_env(environ),
+            start_new_session=True
+        )
+        out, _ = process.communicate()
+        return process.returncode, out
+
+
+class DirectBuilder(object):
+
+    IMPORT_BLOCK_RE = lazy_compile(r"^import \((?P<imports>[^)]*)\)", re.M)
+    IMPORT_PATH_RE = lazy_compile(r'"(?P<path>[^"]+)"')
+    EXPORT_FORMAT = (
+        "{{if .Export}}packagefile {{.ImportPath}}={{.Export}}{{end}}"
+    )
+    UNSUPPORTED_PACKAGES = {"runtime/cgo"}
+
+    def __init__(self, toolchain, root=IMPORTCFG_CACHE_DIR):
+        self.toolchain = toolchain
+        self.root = os.path.expanduser(root)
+        self._importcfgs = dict()
+        self._tool_dir = None
+
+    @property
+    def fingerprint(self):
+        return self.toolchain.fingerprint
+
+    @property
+    def tool_dir(self):
+        if self._tool_dir is None:
+            self._tool_dir = self.toolchain.env()["GOTOOLDIR"]
+        return self._tool_dir
+
+    def _imports(self, source):
+        result = self.IMPORT_BLOCK_RE.search(source)
+        if not result:
+            return None
+        return sorted(set(
+            self.IMPORT_PATH_RE.findall(result.group("imports"))
+        ))
+
+    def _importcfg_path(self, packages):
+        name = hashlib.sha256(
+            "\n".join(packages).encode("utf8")
+        ).hexdigest()
+        return os.path.join(
+            self.root, self.fingerprint[:16], name + ".importcfg"
+        )
+
+    def _is_valid(self, importcfg_path):
+        with open(importcfg_path) as f:
+            for line in f:
+                package_file = line.strip().split("=", 1)[-1]
+                if not os.path.exists(package_file):
+                    return False
+        return True
+
+    def importcfg(self, packages, environ=None):
+        importcfg_path = self._importcfg_path(packages)
+        if importcfg_path in self._importcfgs:
+            return importcfg_path
+        if os.path.exists(importcfg_path) and self._is_valid(importcfg_path):
+            self._importcfgs[importcfg_path] = True
+            return importcfg_path
+
+        process = subprocess.Popen(
+            [self.toolchain.go, "list", "-export", "-deps",
+             "-f", self.EXPORT_FORMAT, "runtime"] + packages,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=self.toolchain.subprocess_env(environ)
+        )
+        out, _ = process.communicate()
+        if process.returncode != 0:
+            return None
+        lines = out.decode("utf8").splitlines()
+        for line in lines:
+            package = line.split(" ", 1)[-1].split("=", 1)[0]
+            if package in self.UNSUPPORTED_PACKAGES:
+                return None
+
+        directory = os.path.dirname(importcfg_path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(importcfg_path + ".tmp", "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.rename(importcfg_path + ".tmp", importcfg_path)
+        self._importcfgs[importcfg_path] = True
+        return importcfg_path
+
+    def _invalidate(self, importcfg_path):
+        self._importcfgs.pop(importcfg_path, None)
+        if os.path.exists(importcfg_path):
+            os.remove(importcfg_path)
+
+    def _tool(self, name, *args, environ=None):
+        process = subprocess.Popen(
+            [os.path.join(self.tool_dir, name)] + list(args),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env=self.toolchain.subprocess_env(environ),
+            start_new_session=True
+        )
+        out, _ = process.communicate()
+        return process.returncode, out
+
+    def build(self, source_path, output_path, environ=None):
+        with open(source_path) as f:
+            packages = self._imports(f.read())
+        importcfg = packages is not None and self.importcfg(packages, environ)
+        if not importcfg:
+            return self.toolchain.build(source_path, output_path, environ)
+
+        archive = output_path + ".a"
+        returncode, out = self._tool(
+            "compile", "-o", archive, "-p", "main",
+            "-importcfg", importcfg, "-pack", source_path, environ=environ
+        )
+        if returncode != 0 and b"could not import" in out:
+            self._invalidate(importcfg)
+            return self.toolchain.build(source_path, output_path, environ)
+        if returncode != 0:
+            return returncode, b"# command-line-arguments\n" + out
+        try:
+            returncode, out = self._tool(
+                "link", "-s", "-w", "-o", output_path,
+                "-importcfg", importcfg, archive, environ=environ
+            )
+        finally:
+            os.remove(archive)
+        if returncode != 0:
+            self._invalidate(importcfg)
+            return self.toolchain.build(source_path, output_path, environ)
+        return returncode, out
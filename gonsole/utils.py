@@ -1,6 +1,6 @@
 # coding: utf8
 
-import requests
+import re
 
 from .const import STANDARD_SPACE
 
@@ -9,6 +9,19 @@ def inflate_space(code, indent):
     return STANDARD_SPACE * indent + code
 
 
-def post_to_playground(context):
-    result = requests.post("https://play.golang.org/share", data=context)
-    return "https://play.golang.org/p/" + result.text
+class LazyPattern(object):
+
+    def __init__(self, pattern, flags=0):
+        self.pattern = pattern
+        self.flags = flags
+        self._compiled = None
+
+    def __getattr__(self, name):
+        if self._compiled is None:
+            self._compiled = re.compile(self.pattern, self.flags)
+        return getattr(self._compiled, name)
+
+
+def lazy_compile(pattern, flags=0):
+    # compiled on first use, so importing gonsole doesn't pay for every regex
+    return LazyPattern(pattern, flags)
@@ -0,0 +1,36 @@
+# coding: utf8
+
+import os
+import tempfile
+
+from .const import WORKSPACE_ROOTS
+
+
+def default_root():
+    for root in WORKSPACE_ROOTS:
+        if os.path.isdir(root) and os.access(root, os.W_OK | os.X_OK):
+            return root
+    return tempfile.gettempdir()
+
+
+class Workspace(object):
+
+    # the build cache writes its own copy of each program, under this name
+    SOURCE_NAME = "main.go"
+
+    def __init__(self, root=None):
+        self.root = os.path.abspath(
+            os.path.expanduser(root or default_root())
+        )
+
+    def go_env(self):
+        # shared by every session under the same root: the go build cache
+        # is safe for concurrent use and go makes its own dirs in GOTMPDIR
+        env = dict()
+        for name, directory in (("GOCACHE", "gonsole-gocache"),
+                                ("GOTMPDIR", "gonsole-gotmp")):
+            if os.environ.get(name):
+                continue
+            env[name] = os.path.join(self.root, directory)
+            os.makedirs(env[name], exist_ok=True)
+        return env
@@ -14,9 +14,15 @@ setup(
     include_package_data=True,
     zip_safe=True,
     entry_points={
-        'console_scripts': ['gonsole = gonsole.gonsole:execute']
+        'console_scripts': [
+            'gonsole = gonsole.gonsole:execute',
+            'gonsole-server = gonsole.server:execute [server]'
+        ]
     },
     install_requires=[
         "requests>=2.8.1"
-    ]
+    ],
+    extras_require={
+        "server": ["tornado>=6.0"]
+    }
 )
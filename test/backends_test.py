@@ -0,0 +1,144 @@
+# coding: utf8
+
+import asyncio
+import unittest
+import concurrent.futures
+from unittest import mock
+
+from gonsole.backends import BuildBackend
+from gonsole.backends import DirectBuildBackend
+from gonsole.backends import create_backend
+from gonsole.cache import BuildResult
+from gonsole.pool import CompilePool
+from gonsole.process import ProcessResult
+from gonsole.const import PRIORITY_WARM_UP
+
+
+class TestBackends(unittest.TestCase):
+
+    def test_create_backend_by_name(self):
+        toolchain = mock.MagicMock()
+
+        self.assertTrue(
+            isinstance(create_backend("build", toolchain), BuildBackend)
+        )
+        self.assertTrue(
+            isinstance(create_backend("direct", toolchain), DirectBuildBackend)
+        )
+
+    def test_backends_should_share_one_build_cache(self):
+        toolchain = mock.MagicMock()
+
+        build = BuildBackend(toolchain, pool=mock.MagicMock())
+        direct = DirectBuildBackend(toolchain, pool=mock.MagicMock())
+
+        self.assertTrue(build.cache is direct.cache)
+        self.assertTrue(build.builder is toolchain)
+        self.assertTrue(direct.builder.toolchain is toolchain)
+
+    def test_build_backend_return_compile_error_without_running(self):
+        backend = BuildBackend(mock.MagicMock(), pool=CompilePool(1))
+        backend.cache = mock.MagicMock()
+        backend.cache.get.return_value = None
+        backend.cache.build.return_value.success = False
+        backend.cache.build.return_value.error = b"undefined: x"
+
+        out, err = asyncio.run(backend.run("package main", "main.go"))
+
+        self.assertEqual((out, err), (b"", b"undefined: x"))
+        backend.pool.shutdown()
+
+    @mock.patch("gonsole.backends.run_process")
+    def test_silent_non_zero_exit_should_be_an_error(self, mock_run):
+        backend = BuildBackend(mock.MagicMock(), pool=mock.MagicMock())
+        backend.cache = mock.MagicMock()
+        backend.cache.get.return_value.success = True
+
+        async def run(args, timeout=None, stdout=None, stderr=None):
+            return ProcessResult(b"", b"", 3, rusage)
+        rusage = mock.MagicMock(ru_utime=0.1, ru_stime=0.1, ru_maxrss=1024)
+        mock_run.side_effect = run
+
+        out, err = asyncio.run(backend.run("package main", "main.go"))
+
+        self.assertEqual(err, b"exit status 3\n")
+
+    def test_compile_should_return_error_only(self):
+        pool = mock.MagicMock()
+        backend = BuildBackend(mock.MagicMock(), pool=pool)
+        backend.cache = mock.MagicMock()
+        backend.cache.get.return_value.success = True
+
+        err = asyncio.run(backend.compile("package main", "main.go"))
+
+        self.assertEqual(err, b"")
+
+    def test_build_backend_should_not_queue_cached_build(self):
+        pool = mock.MagicMock()
+        backend = BuildBackend(mock.MagicMock(), pool=pool)
+        backend.cache = mock.MagicMock()
+        backend.cache.get.return_value.success = False
+        backend.cache.get.return_value.error = b"undefined: x"
+
+        out, err = asyncio.run(backend.run("package main", "main.go"))
+
+        self.assertEqual(err, b"undefined: x")
+        pool.submit.assert_not_called()
+
+    def test_warm_up_should_queue_build_behind_everything_else(self):
+        pool = mock.MagicMock()
+        backend = BuildBackend(mock.MagicMock(), pool=pool)
+        backend.cache = mock.MagicMock()
+
+        backend.warm_up(["strings", "fmt", "runtime"])
+
+        self.assertEqual(pool.submit.call_args[0][3], PRIORITY_WARM_UP)
+        self.assertEqual(
+            pool.submit.call_args[0][1], backend.toolchain.compile_packages
+        )
+        self.assertEqual(
+            pool.submit.call_args[0][2], (["runtime", "fmt", "strings"], None)
+        )
+        backend.cache.build.assert_not_called()
+
+    def test_queued_build_should_carry_source_and_session_env(self):
+        pool = mock.MagicMock()
+        environ = {"GOTMPDIR": "/dev/shm/gonsole-gotmp"}
+        backend = BuildBackend(mock.MagicMock(), pool=pool, environ=environ)
+        backend.cache = mock.MagicMock()
+        backend.cache.get.return_value = None
+        built = concurrent.futures.Future()
+        built.set_result(BuildResult(error=b"undefined: x"))
+        pool.submit.return_value = built
+
+        asyncio.run(backend.run("package main", "main.go"))
+
+        self.assertEqual(
+            pool.submit.call_args[0][2],
+            ("package main", "main.go", environ, backend.builder)
+        )
+
+    @mock.patch("gonsole.backends.run_process")
+    def test_binary_evicted_before_it_ran_should_be_built_again(
+            self, mock_run):
+        pool = mock.MagicMock()
+        backend = BuildBackend(mock.MagicMock(), pool=pool)
+        backend.cache = mock.MagicMock()
+        backend.cache.get.side_effect = [BuildResult(binary="/evicted"), None]
+        built = concurrent.futures.Future()
+        built.set_result(BuildResult(binary="/built"))
+        pool.submit.return_value = built
+        rusage = mock.MagicMock(ru_utime=0.1, ru_stime=0.1, ru_maxrss=1024)
+        mock_run.side_effect = [
+            FileNotFoundError(), ProcessResult(b"3\n", b"", 0, rusage)
+        ]
+
+        out, err = asyncio.run(backend.run("package main", "main.go"))
+
+        self.assertEqual((out, err), (b"3\n", b""))
+        self.assertEqual(mock_run.call_args[0][0], ["/built"])
+        self.assertEqual(pool.submit.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
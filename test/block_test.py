@@ -41,25 +41,74 @@ class TestBlock(unittest.TestCase):
         result = block.parse_to_codes()
 
         self.assertEqual(type(result), list)
-        self.assertEqual(len(result), 2)
+        self.assertEqual(result, ["fmt.Println"])
 
     def test_parse_two_method_when_use_package_method_as_anothers_value(self):
         block = Block("get(console.Find())")
 
         result = block.parse_to_codes()
 
-        self.assertEqual(len(result), 3)
-        self.assertTrue(result[0] == "get(console.Find())")
-        self.assertTrue(result[1].startswith("get"))
-        self.assertTrue(result[2].startswith('console.'))
+        self.assertEqual(result, ["get", "console.Find"])
 
     def test_parse_one_metho_when_a_string_like_method(self):
         block = Block('get("console.Find()")')
 
         result = block.parse_to_codes()
 
-        self.assertEqual(len(result), 2)
-        self.assertTrue(result[0].startswith('get'))
+        self.assertEqual(result, ["get"])
+
+    def test_parse_codes_across_nested_blocks(self):
+        block = Block("if a == 1 {")
+        block.append(Block("console.Find().get()"))
+        block.append("}")
+
+        result = block.parse_to_codes()
+
+        self.assertEqual(result, ["a", "console.Find"])
+
+    @mock.patch("gonsole.block.block.tokenize")
+    def test_parse_codes_only_once_for_same_block(self, mock_tokenize):
+        mock_tokenize.return_value = iter(["a"])
+        block = Block("a++")
+
+        block.parse_to_codes()
+        block.get_token_set()
+
+        self.assertEqual(mock_tokenize.call_count, 1)
+
+    def test_append_code_should_refresh_analysis(self):
+        block = Block("if a == 1 {")
+        block.parse_to_codes()
+        block.deflate(1)
+
+        block.append("b++}")
+
+        self.assertEqual(block.parse_to_codes(), ["a", "b"])
+        self.assertEqual(len(block.deflate(1)), 2)
+
+    def test_loaded_block_should_not_be_parsed_again(self):
+        block = Block("if a == 1 {")
+        block.append(Block("b := a"))
+        block.append("}")
+        data = block.dump()
+
+        with mock.patch("gonsole.block.block.tokenize") as mock_tokenize:
+            loaded = Block.load(data)
+
+            self.assertEqual(loaded.get_codes(), block.get_codes())
+            self.assertEqual(loaded.get_names(), {"a", "b"})
+            self.assertFalse(loaded.is_declared())
+        mock_tokenize.assert_not_called()
+
+    def test_bound_names_should_include_parameters_and_locals(self):
+        block = Block("func show(path struct{ X int }, b strings.Builder) {")
+        block.append(Block("for _, p := range ps {"))
+        block.append("}")
+
+        names = block.get_bound_names()
+
+        self.assertTrue({"show", "path", "b", "p"} <= names)
+        self.assertFalse("strings" in names)
 
     def test_return_true_when_is_a_declared_vari_code(self):
         block = Block("a := 1")
@@ -0,0 +1,151 @@
+# coding: utf8
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from gonsole.cache import BuildCache, OutputCache
+
+
+def fake_build(source_path, output_path, environ=None):
+    with open(output_path, "wb") as f:
+        f.write(b"x" * 10)
+    return 0, b""
+
+
+class TestBuildCache(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.toolchain = mock.MagicMock(fingerprint="go1.21")
+        self.toolchain.build.side_effect = fake_build
+        self.cache = BuildCache(self.toolchain, root=self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_should_build_binary_when_cache_missed(self):
+        result = self.cache.build("package main", "main.go")
+
+        self.assertTrue(result.success)
+        self.assertFalse(result.hit)
+        self.assertTrue(os.path.exists(result.binary))
+
+    def test_should_not_build_again_when_source_not_changed(self):
+        self.cache.build("package main", "main.go")
+
+        result = self.cache.build("package main", "main.go")
+
+        self.assertTrue(result.hit)
+        self.assertEqual(self.toolchain.build.call_count, 1)
+
+    def test_should_cache_compile_error(self):
+        self.toolchain.build.side_effect = None
+        self.toolchain.build.return_value = (1, b"undefined: x")
+        self.cache.build("package main", "main.go")
+
+        result = self.cache.build("package main", "main.go")
+
+        self.assertTrue(result.hit)
+        self.assertFalse(result.success)
+        self.assertEqual(result.error, b"undefined: x")
+
+    def test_should_build_a_private_copy_of_the_source(self):
+        built = list()
+
+        def build(path, output_path, environ=None):
+            with open(path) as f:
+                built.append((path, f.read(), environ))
+            return fake_build(path, output_path)
+        self.toolchain.build.side_effect = build
+
+        self.cache.build("package one", "main.go", {"GOTMPDIR": "/go"})
+
+        self.assertTrue(built[0][0].startswith(self.root))
+        self.assertEqual(os.path.basename(built[0][0]), "main.go")
+        self.assertEqual(built[0][1:], ("package one", {"GOTMPDIR": "/go"}))
+
+    def test_should_share_one_cache_per_directory(self):
+        other = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, other, True)
+
+        cache = BuildCache.instance(self.toolchain, self.root)
+
+        self.assertIs(BuildCache.instance(self.toolchain, self.root), cache)
+        self.assertIsNot(BuildCache.instance(self.toolchain, other), cache)
+
+    def test_should_build_with_the_builder_given(self):
+        builder = mock.MagicMock()
+        builder.build.side_effect = fake_build
+
+        result = self.cache.build("package main", "main.go", None, builder)
+
+        self.assertTrue(result.success)
+        self.toolchain.build.assert_not_called()
+
+    def test_should_not_cache_build_killed_by_signal(self):
+        self.toolchain.build.side_effect = None
+        self.toolchain.build.return_value = (-9, b"signal: killed")
+
+        result = self.cache.build("package main", "main.go")
+
+        self.assertEqual(result.error, b"signal: killed")
+        self.assertEqual(self.cache.get(self.cache.key("package main")), None)
+
+    def test_should_use_different_key_when_toolchain_changed(self):
+        key = self.cache.key("package main")
+        self.toolchain.fingerprint = "go1.22"
+
+        self.assertNotEqual(key, self.cache.key("package main"))
+
+    def test_should_evict_least_recently_used_when_over_size(self):
+        self.cache.max_size = 25
+        first = self.cache.build("a", "main.go")
+        second = self.cache.build("b", "main.go")
+        os.utime(os.path.dirname(first.binary), (0, 0))
+        os.utime(os.path.dirname(second.binary), (1, 1))
+
+        self.cache.build("c", "main.go")
+
+        self.assertFalse(os.path.exists(first.binary))
+        self.assertTrue(os.path.exists(second.binary))
+
+
+
+class TestOutputCache(unittest.TestCase):
+
+    def test_should_count_hits_and_misses(self):
+        cache = OutputCache()
+        key = cache.key("package main")
+
+        self.assertIsNone(cache.get(key))
+        cache.put(key, [b"1\n"])
+
+        self.assertEqual(cache.get(key), [b"1\n"])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertIn("50% hit rate", cache.summary())
+
+    def test_should_evict_least_recently_used_when_full(self):
+        cache = OutputCache(max_size=4)
+        cache.put("a", [b"aa"])
+        cache.put("b", [b"bb"])
+        cache.get("a")
+
+        cache.put("c", [b"cc"])
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_should_not_keep_output_larger_than_the_cache(self):
+        cache = OutputCache(max_size=4)
+
+        cache.put("a", [b"aaa", b"aa"])
+
+        self.assertIsNone(cache.get("a"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,16 +1,53 @@
 # coding: utf8
 
+import os
+import sys
+import shutil
+import tempfile
+import threading
 import unittest
+import subprocess
+import concurrent.futures
 from unittest import mock
 
 from gonsole.console import Console
 from gonsole.block import Block
+from gonsole.stdlib import StdlibIndex
+from gonsole.toolchain import Toolchain
 
+from gonsole.const import ERROR_HEAD_LINES
 from gonsole.exceptions import NotDeclaredError
 
 
+def fake_stdlib(test):
+    root = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, root, True)
+    toolchain = mock.MagicMock(fingerprint="go-test")
+    toolchain.list_std.return_value = [
+        ("fmt", "fmt"), ("strings", "strings"), ("math/rand", "rand"),
+        ("crypto/rand", "rand"), ("time", "time"),
+    ]
+    toolchain.doc.side_effect = lambda path: {
+        "math/rand": "func Intn(n int) int\n",
+        "crypto/rand": "var Reader io.Reader\n",
+    }[path]
+    return StdlibIndex(toolchain, root=root)
+
+
+def use_fake_stdlib(test):
+    # what Console() finds, without go list or the real cache directory
+    patcher = mock.patch.object(
+        StdlibIndex, "instance", return_value=fake_stdlib(test)
+    )
+    patcher.start()
+    test.addCleanup(patcher.stop)
+
+
 class TestConsole(unittest.TestCase):
 
+    def setUp(self):
+        use_fake_stdlib(self)
+
     @mock.patch('sys.exit')
     def test_invoke_sys_exit_when_given_code_exit(self, mock_exit):
         console = Console()
@@ -20,7 +57,7 @@ class TestConsole(unittest.TestCase):
         mock_exit.assert_called_once_with(0)
 
     def test_console_import_code_with_single_import(self):
-        code = 'import "yyx"'
+        code = 'import "strings"'
         console = Console()
 
         console._run(code)
@@ -29,13 +66,67 @@ class TestConsole(unittest.TestCase):
             len(console.packages.get_declared()), 2
         )
         self.assertTrue(
-            "yyx" in console.packages.get_declared()
+            "strings" in console.packages.get_declared()
+        )
+
+    def test_import_should_reject_unknown_standard_package(self):
+        console = Console()
+
+        result = console._run('import "strngs"')
+
+        self.assertEqual(
+            result, 'package strngs is not in std, did you mean "strings"?'
+        )
+        self.assertTrue("strngs" not in console.packages.get_declared())
+        self.assertEqual(console.errors, 1)
+
+    def test_import_should_accept_module_path(self):
+        console = Console()
+
+        console._run('import "github.com/yyx/console"')
+
+        self.assertTrue(
+            "github.com/yyx/console" in console.packages.get_declared()
+        )
+
+    def test_selected_standard_package_should_be_imported(self):
+        console = Console()
+        console.execute = mock.MagicMock()
+
+        console.process(Block("fmt.Println(strings.ToUpper(x), rand.Intn(3))"))
+
+        self.assertEqual(
+            sorted(console.packages.get_declared()),
+            ["fmt", "math/rand", "strings"]
+        )
+
+    def test_selector_in_multi_line_block_should_not_fail(self):
+        console = Console()
+        console.execute = mock.MagicMock()
+        block = Block("for _, p := range ps {")
+        block.append(Block("fmt.Println(p.X, strings.ToUpper(p.Name))"))
+        block.append("}")
+
+        console.process(block)
+
+        self.assertEqual(
+            sorted(console.packages.get_declared()), ["fmt", "strings"]
         )
 
+    def test_parameter_named_like_a_package_should_not_be_imported(self):
+        console = Console()
+        method = Block("func base(strings struct{ Base string }) string {")
+        method.append("return strings.Base")
+        method.append("}")
+
+        console.process(method)
+
+        self.assertEqual(list(console.packages.get_declared()), ["fmt"])
+
     def test_could_not_import_same_package_multi_times(self):
         code = 'import "fmt"'
         console = Console()
-        console.packages.assignment_manager.get_all_declared().clear()
+        console.packages.assignment_manager.clear_declared()
 
         console._run(code)
         console._run(code)
@@ -68,17 +159,57 @@ class TestConsole(unittest.TestCase):
     def test_give_a_direct_command_would_invoke_direct_method(self):
         console = Console()
         console.direct_command = mock.MagicMock()
-        console._write_to_file = mock.MagicMock()
         console.execute = mock.MagicMock()
-        code = "12 + 34"
+        code = "12 + x"
 
-        console.try_run_direct_command(code)
+        console.run_line(code)
 
         console.direct_command.assert_called_once_with(code)
 
+    def test_constant_direct_command_should_not_be_compiled(self):
+        console = Console()
+        console.execute = mock.MagicMock()
+
+        result = console.run_line('12 + 34, "a" + "b"')
+
+        self.assertEqual(result, "46 ab")
+        console.execute.assert_not_called()
+
+    def test_direct_command_printing_nothing_should_not_run_as_code(self):
+        console = Console()
+        console.execute = mock.MagicMock(return_value=None)
+        console._run = mock.MagicMock()
+
+        console.run_line("1 << 64")
+
+        console.execute.assert_called_once_with(mock.ANY, rollback=False)
+        console._run.assert_not_called()
+
+
+    @mock.patch.dict(os.environ, {"GOCACHE": "", "GOTMPDIR": ""})
+    def test_go_env_should_belong_to_the_console_backend(self):
+        roots = [tempfile.mkdtemp() for _ in range(2)]
+        for root in roots:
+            self.addCleanup(shutil.rmtree, root, True)
+        first, second = [Console(workspace_root=root) for root in roots]
+
+        self.assertEqual(os.listdir(roots[0]), [])
+        self.assertEqual(
+            first.backend.environ["GOTMPDIR"],
+            os.path.join(roots[0], "gonsole-gotmp")
+        )
+        self.assertEqual(
+            second.backend.environ["GOTMPDIR"],
+            os.path.join(roots[1], "gonsole-gotmp")
+        )
+        self.assertEqual(Toolchain.instance().environ, {})
+
 
 class TestConsoleIntegration(unittest.TestCase):
 
+    def setUp(self):
+        use_fake_stdlib(self)
+
     def test_if_a_variable_not_declared_before_should_raise_error(self):
         console = Console()
         console.assignment_manager.clear()
@@ -134,5 +265,271 @@ class TestConsoleIntegration(unittest.TestCase):
         )
 
 
+class TestWarmUp(unittest.TestCase):
+
+    def setUp(self):
+        use_fake_stdlib(self)
+
+    def test_warm_up_should_compile_packages_once(self):
+        console = Console(warm_up_packages=["strings", "os"])
+        console.backend = mock.MagicMock()
+        built = concurrent.futures.Future()
+        built.set_result(None)
+        console.backend.warm_up.return_value = built
+
+        console.warm_up()
+
+        console.backend.warm_up.assert_called_once_with(["strings", "os"])
+        console.close()
+
+    @mock.patch("threading.Thread")
+    def test_init_should_not_warm_up_when_turned_off(self, mock_thread):
+        console = Console(warm_up_packages=None)
+
+        console.init()
+
+        mock_thread.assert_not_called()
+        console.close()
+
+
+class TestConcurrentConsoles(unittest.TestCase):
+
+    def setUp(self):
+        use_fake_stdlib(self)
+
+    def test_consoles_running_at_once_keep_their_own_names(self):
+        count = 8
+        barrier = threading.Barrier(count)
+        programs = dict()
+
+        def execute(source):
+            # every console waits for the others mid-line
+            barrier.wait(timeout=5)
+            return source
+
+        def session(index):
+            console = Console()
+            console.execute = execute
+            console.process(Block("v{0} := {0}".format(index)))
+            console.process(Block("shared := v{0} * 2".format(index)))
+            programs[index] = console.process(Block("fmt.Println(shared)"))
+            console.close()
+
+        threads = [
+            threading.Thread(target=session, args=(index,))
+            for index in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for index in range(count):
+            self.assertIn("v{0} := {0}".format(index), programs[index])
+            self.assertIn("shared := v{0} * 2".format(index), programs[index])
+            self.assertEqual(programs[index].count("v"), 2)
+
+
+class TestOutputCache(unittest.TestCase):
+
+    def setUp(self):
+        use_fake_stdlib(self)
+
+    def run_twice(self, console, *body):
+        runs = list()
+
+        async def run(source, source_path, timeout=None, stdout=None,
+                      priority=None, stderr=None):
+            runs.append(source)
+            self.stderr = stderr
+            stdout.write(b"3\n")
+            return b"", b""
+        console.backend = mock.MagicMock(run=run)
+        method = Block("func f(x int) int {")
+        for line in body:
+            method.append(line)
+        method.append("}")
+        console.process(method)
+        results = [console.process(Block("fmt.Println(f(1))"))
+                   for _ in range(2)]
+        console.close()
+        return runs, results
+
+    def test_deterministic_program_should_run_once(self):
+        console = Console(stream=False)
+
+        runs, results = self.run_twice(console, "return x + 2")
+
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(results, ["3", "3"])
+        self.assertEqual(console.output_cache.hits, 1)
+        self.assertEqual(self.stderr.head, ERROR_HEAD_LINES)
+
+    def test_program_using_time_should_run_every_time(self):
+        console = Console(stream=False)
+        console._cache_import('"time"')
+
+        runs, _ = self.run_twice(console, "return x + time.Now().Second()")
+
+        self.assertEqual(len(runs), 2)
+
+    def test_program_starting_goroutine_should_run_every_time(self):
+        console = Console(stream=False)
+
+        runs, _ = self.run_twice(console, "go fmt.Println(x)", "return x")
+
+        self.assertEqual(len(runs), 2)
+
+    def test_nocache_should_turn_the_cache_off(self):
+        console = Console(stream=False)
+
+        self.assertEqual(console.do_nocache(), "output cache off")
+        runs, _ = self.run_twice(console, "return x + 2")
+
+        self.assertEqual(len(runs), 2)
+
+    def test_cached_output_should_be_streamed_again(self):
+        console = Console()
+        console.output = mock.MagicMock()
+
+        self.run_twice(console, "return x + 2")
+
+        self.assertEqual(
+            console.output.call_args_list, [mock.call("3"), mock.call("3")]
+        )
+
+
+class TestSaveLoad(unittest.TestCase):
+
+    def setUp(self):
+        use_fake_stdlib(self)
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.path = os.path.join(self.root, "session.json")
+
+    def console(self, err=b""):
+        console = Console(warm_up_packages=None, autosave=self.path)
+        self.compiled = list()
+
+        async def compile(source, source_path, priority=None):
+            self.compiled.append(source)
+            return err
+        console.backend = mock.MagicMock(compile=compile)
+        console.execute = mock.MagicMock(return_value=None)
+        self.addCleanup(console.close)
+        return console
+
+    def fill(self, console):
+        console._run('import "strings"')
+        method = Block("func twice(s string) string {")
+        method.append("return s + s")
+        method.append("}")
+        console.process(method)
+        console.process(Block('a := "go"'))
+        console.process(Block("type T struct{ n int }"))
+        console.process(Block("b := twice(strings.ToUpper(a))"))
+
+    def test_loaded_session_should_render_what_was_saved(self):
+        console = self.console()
+        self.fill(console)
+        self.assertEqual(
+            console.do_save(self.path), "saved 3 lines to " + self.path
+        )
+        expected = console.process(Block("fmt.Println(b, T{})"))
+
+        loaded = self.console()
+        result = loaded.do_load(self.path)
+        program = loaded.process(Block("fmt.Println(b, T{})"))
+
+        self.assertEqual(result, "loaded 3 lines from " + self.path)
+        self.assertEqual(len(self.compiled), 1)
+        self.assertIn("_ = b", self.compiled[0])
+        self.assertIn("_ = new(T)", self.compiled[0])
+        self.assertIn("_ = twice", self.compiled[0])
+        self.assertEqual(program, expected)
+        self.assertEqual(loaded.codes.blocks[-1].get_codes(),
+                         ["fmt.Println(b, T{})"])
+
+    def test_load_should_report_what_does_not_compile(self):
+        console = self.console()
+        self.fill(console)
+        console.do_save(self.path)
+
+        loaded = self.console(err=b"# command-line-arguments\n"
+                                  b"./main.go:9:5: undefined: twice\n")
+        result = loaded.do_load(self.path)
+
+        self.assertEqual(
+            result, "loaded 3 lines from {0}, but they don't compile:\n"
+            "# command-line-arguments\nundefined: twice".format(self.path)
+        )
+        self.assertEqual(loaded.errors, 1)
+
+    def test_load_should_keep_session_when_file_is_damaged(self):
+        console = self.console()
+        console.process(Block("a := 1"))
+        with open(self.path, "w") as f:
+            f.write("{")
+
+        result = console.do_load(self.path)
+
+        self.assertTrue(result.startswith("could not load " + self.path))
+        self.assertIn("a", console.codes.get_declared())
+        self.assertEqual(console.errors, 1)
+
+    def test_bare_save_and_load_need_a_file_without_autosave(self):
+        console = self.console()
+        console.autosave = None
+
+        self.assertEqual(console._run("save"), "no file given")
+        self.assertEqual(console._run("load"), "no file given")
+        self.assertEqual(console.errors, 2)
+
+    @mock.patch("sys.exit")
+    def test_exit_should_save_for_a_bare_load(self, mock_exit):
+        console = self.console()
+        self.fill(console)
+        console.output = mock.MagicMock()
+
+        console._run("exit")
+        loaded = self.console()
+
+        self.assertEqual(
+            loaded._run("load"), "loaded 3 lines from " + self.path
+        )
+        self.assertIn("twice", loaded.custom_methods.get_declared())
+        self.assertIn("strings", loaded.packages.get_declared())
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_prompt_should_not_wait_for_modules_used_later(self):
+        # a fresh interpreter, the test run has imported everything already
+        script = (
+            "import sys\n"
+            "from gonsole.gonsole import parse_args\n"
+            "from gonsole.console import Console\n"
+            "console = Console(warm_up_packages=None)\n"
+            "console.init()\n"
+            "console.close()\n"
+            "print(' '.join(name for name in ("
+            "'requests', 'asyncio', 'tornado', 'readline', "
+            "'concurrent.futures') if name in sys.modules))\n"
+        )
+        loaded = subprocess.check_output([sys.executable, "-c", script])
+
+        self.assertEqual(loaded.strip(), b"")
+
+    def test_backend_should_be_created_on_first_use(self):
+        from gonsole.backends import BACKENDS
+        from gonsole.const import BACKEND_NAMES
+
+        console = Console(backend="direct", warm_up_packages=None)
+
+        self.assertIsNone(console._backend)
+        self.assertIs(type(console.backend), BACKENDS["direct"])
+        self.assertEqual(sorted(BACKEND_NAMES), sorted(BACKENDS))
+
+
 if __name__ == '__main__':
     unittest.main()
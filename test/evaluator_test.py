@@ -0,0 +1,92 @@
+# coding: utf8
+
+import os
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+from gonsole.evaluator import evaluate
+from gonsole.exceptions import NotConstantError
+
+# what go itself prints is checked in TestAgainstGo
+EXPRESSIONS = [
+    "4+5", "7/2", "-7/2", "-7%3", "5 &^ 3", "-5 >> 1", "^1", "1<<10 - 1",
+    "1 | 2 ^ 3 & 4", "1 << 62", "1 << 100 >> 98", "123456789012345678",
+    "0x_1F", "0o17", "017", "0b101", "1_000_000",
+    "7/2.0", "1/3.0", "0.1 + 0.2", "2.0*3", "1.5 + 2", "-0.0", ".5", "1.",
+    "1e5", "1e6", "1234567.0", "123456.0", "1234.5678", "1e-5", "0.0001",
+    "2.5e-3", "1e21", "1e100", "-1e6", "9007199254740993.0", "0x1p-2",
+    "0x1.8p1", "1_0.2_5e1_0", "0123e1", "1.0 << 3",
+    "'a'", "'a'+1", "'a' * 2.0", "'\\x41'", "'\\377'", "'\\''", "'\\u00e9'",
+    "'é'", '"a" + "b"', '"tab\\there"', '"\\xe4\\xb8\\x96"', '"\\""',
+    "`raw\\n`", '"a" < "b"', "1 < 2", "1 == 1.0", "(1 + 2) * 3",
+    "1 != 2 && 2 > 1 || false", '1, "a", 2.5', '"\\xe4" + "\\xb8\\x96"',
+    '"\\xff"',
+]
+
+NOT_CONSTANT = [
+    "1<<63", "1/0", "1.5%1", '"a"+1', "'ab'", "x+1", "1e400", "08", "1i",
+    '"\\400"', "'a' * 100000000", "1 <<", "(1", 'len("a")', "1.5 << 1",
+    "true + 1", '"a" && true', "1 << -1", '"\\xff"',
+]
+
+
+class TestEvaluate(unittest.TestCase):
+
+    def test_integer_division_should_truncate_towards_zero(self):
+        self.assertEqual(evaluate("-7 / 2"), "-3")
+        self.assertEqual(evaluate("-7 % 2"), "-1")
+
+    def test_untyped_float_should_be_exact_until_printed(self):
+        self.assertEqual(evaluate("1/3.0 * 3 == 1"), "true")
+
+    def test_rune_should_print_as_a_number(self):
+        self.assertEqual(evaluate("'a'"), "97")
+
+    def test_float_should_print_like_fmt(self):
+        self.assertEqual(evaluate("123456.0"), "123456")
+        self.assertEqual(evaluate("1e6"), "1e+06")
+        self.assertEqual(evaluate("1e-5"), "1e-05")
+        self.assertEqual(evaluate("0.25"), "0.25")
+
+    def test_values_should_be_joined_with_spaces(self):
+        self.assertEqual(evaluate('1, "a", 2.5'), "1 a 2.5")
+
+    def test_should_leave_the_rest_to_the_compiler(self):
+        for text in NOT_CONSTANT:
+            with self.assertRaises(NotConstantError, msg=text):
+                evaluate(text)
+
+
+@unittest.skipUnless(shutil.which("go"), "go is not installed")
+class TestAgainstGo(unittest.TestCase):
+
+    SEPARATOR = "<<gonsole-evaluator>>"
+
+    def test_should_print_what_go_prints(self):
+        directory = tempfile.mkdtemp()
+        source_path = os.path.join(directory, "main.go")
+        with open(source_path, "w") as f:
+            f.write('package main\n\nimport "fmt"\n\nfunc main() {\n')
+            for text in EXPRESSIONS:
+                f.write("    fmt.Println({0})\n".format(text))
+                f.write('    fmt.Println("{0}")\n'.format(self.SEPARATOR))
+            f.write("}\n")
+        try:
+            output = subprocess.check_output(
+                ["go", "run", source_path], cwd=directory
+            ).decode("utf8", "surrogateescape")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        printed = output.split(self.SEPARATOR + "\n")[:-1]
+        self.assertEqual(len(printed), len(EXPRESSIONS))
+        for text, expected in zip(EXPRESSIONS, printed):
+            if text in NOT_CONSTANT:
+                continue  # the compiler prints it, checked above
+            self.assertEqual(evaluate(text), expected[:-1], msg=text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,19 +1,20 @@
 # coding: utf8
 import unittest
+from unittest import mock
 
 from gonsole.block import Block
 from gonsole.handlers import CodeHandler
 from gonsole.handlers import PackageHandler
 from gonsole.handlers import FunctionHandler
-from gonsole.handlers import AssignmentManager
+from gonsole.session import AssignmentManager
 
 
 class TestAssignmentManager(unittest.TestCase):
     def setUp(self):
-        self.handler = AssignmentManager.instance()
+        self.handler = AssignmentManager()
 
     def test_should_add_assigned(self):
-        self.handler.assigned_params = dict()
+        self.handler.clear()
 
         self.handler.add_assigned("x", "aa")
 
@@ -22,43 +23,71 @@ class TestAssignmentManager(unittest.TestCase):
         self.assertEquals(self.handler.assigned_params["x"], "aa")
 
     def test_should_override_assignment_when_has_same_name(self):
-        self.handler.assigned_params = dict()
-        self.handler.assigned_params["x"] = "aa"
+        self.handler.clear()
+        self.handler.add_assigned("x", "aa")
 
         self.handler.add_assigned("x", "bb")
 
         self.assertEquals(len(self.handler.assigned_params), 1)
         self.assertTrue("x" in self.handler.assigned_params)
         self.assertEquals(self.handler.assigned_params["x"], "bb")
+        self.assertTrue("x" not in self.handler.get_assigned("aa"))
+        self.assertTrue("x" in self.handler.get_assigned("bb"))
+
+    def test_should_move_declared_name_to_new_handler_type(self):
+        self.handler.add_declared("code", "y", "y := 1")
+
+        self.handler.add_declared("method", "y", "func y()")
+
+        self.assertTrue("y" not in self.handler.get_declared("code"))
+        self.assertEqual(self.handler.get_declared("method")["y"], "func y()")
 
 
 class TestPackageHandler(unittest.TestCase):
-    def test_return_true_when_simple_use_builtin_package(self):
+    def test_should_use_package_called_by_name(self):
+        handler = PackageHandler()
+        handler.add('"strings"')
+
+        handler.scan_used([Block('strings.ToUpper("abc")')])
+
+        self.assertEqual(list(handler.get_params()), ["strings"])
+
+    def test_should_use_third_party_package_by_its_name(self):
         handler = PackageHandler()
-        package = 'fmt'
-        code = 'fmt.Println("abc")'
+        handler.add_declared("com.yyx.console", "com.yyx.console")
 
-        result = handler.is_assigned(package, code)
+        handler.scan_used([Block("console.Find()")])
 
-        self.assertTrue(result)
+        self.assertEqual(list(handler.get_params()), ["com.yyx.console"])
 
-    def test_return_true_when_use_third_package(self):
+    def test_should_use_package_when_calls_are_chained(self):
         handler = PackageHandler()
-        package = 'com.yyx.console'
-        code = "console.Find()"
+        handler.add_declared("com.yyx.console", "com.yyx.console")
 
-        result = handler.is_assigned(package, code)
+        handler.scan_used([Block("console.Find().get()")])
 
-        self.assertTrue(result)
+        self.assertEqual(list(handler.get_params()), ["com.yyx.console"])
 
-    def test_return_true_when_use_functional_method(self):
+    def test_should_not_use_package_when_only_prefix_matches(self):
         handler = PackageHandler()
-        package = 'com.yyx.console'
-        code = "console.Find().get()"
+        handler.add('"fmt"')
 
-        result = handler.is_assigned(package, code)
+        handler.scan_used([Block("fmtx.Println()")])
 
-        self.assertTrue(result)
+        self.assertEqual(list(handler.get_params()), [])
+
+    def test_should_scan_package_by_last_path_element(self):
+        handler = PackageHandler()
+        handler.add('"math/rand"')
+        handler.add('"github.com/yyx/console/v2"')
+        handler.add('"fmtx"')
+
+        handler.scan_used([Block("fmtx.Print(rand.Intn(console.Find()))")])
+
+        self.assertEqual(
+            sorted(handler.get_params()),
+            ["fmtx", "github.com/yyx/console/v2", "math/rand"]
+        )
 
     def test_scan_used_package_when_block_is_condition_code(self):
         handler = PackageHandler()
@@ -89,6 +118,19 @@ class TestPackageHandler(unittest.TestCase):
             "com.yyx.text" not in handler.get_params()
         )
 
+    def test_section_should_be_rendered_again_only_when_params_change(self):
+        handler = PackageHandler()
+        handler.assignment_manager.clear()
+        handler.assignment_manager.add_assigned("fmt", handler.handler_type)
+        handler.parse_codes = mock.MagicMock(return_value='    "fmt"')
+
+        handler.section()
+        handler.section()
+        handler.assignment_manager.add_assigned("os", handler.handler_type)
+        handler.section()
+
+        self.assertEqual(handler.parse_codes.call_count, 2)
+
 
 class TestFuncHandler(unittest.TestCase):
     def test_success_add_block(self):
@@ -116,6 +158,15 @@ class TestFuncHandler(unittest.TestCase):
             "Str2int" in handler.get_params()
         )
 
+    def test_should_not_find_method_sharing_a_prefix(self):
+        handler = FunctionHandler()
+        handler.add_declared("Str2", Block("func Str2(sint string) {"))
+        handler.add_declared("Str2int", Block("func Str2int(sint string) {"))
+
+        handler.scan_used([Block('fmt.Println(Str2int("5"))')])
+
+        self.assertEqual(list(handler.get_params()), ["Str2int"])
+
     def test_should_clear_old_assignment_when_clear(self):
         handler = FunctionHandler()
         handler.add_declared("Str2int", Block("func Str2int(sint string) {"))
@@ -142,20 +193,21 @@ class TestCodeHandler(unittest.TestCase):
     def test_success_get_vari_when_use_key_word_var(self):
         block = Block("var a int64")
         handler = CodeHandler()
+        handler.get_declared().clear()
 
-        varis = handler.get_varis(block)
+        handler.add(block)
 
-        self.assertTrue("a" in varis)
-        self.assertTrue(len(varis) == 1)
+        self.assertEqual(list(handler.get_declared()), ["a"])
+        self.assertTrue(handler.get_declared()["a"] is block)
 
     def test_success_get_vari_when_use_key_word_const(self):
         block = Block('const x string = "hello world"')
         handler = CodeHandler()
+        handler.get_declared().clear()
 
-        varis = handler.get_varis(block)
+        handler.add(block)
 
-        self.assertTrue("x" in varis)
-        self.assertTrue(len(varis) == 1)
+        self.assertEqual(list(handler.get_declared()), ["x"])
 
     def test_can_check_used_assignment(self):
         handler = CodeHandler()
@@ -169,34 +221,72 @@ class TestCodeHandler(unittest.TestCase):
         self.assertEqual(len(list(handler.get_params())), 1)
         self.assertTrue("a" in handler.get_params())
 
-    def test_is_need_compile_would_return_true_if_not_assignment_code(self):
+    def test_last_block_should_be_executed_with_its_declarations(self):
         handler = CodeHandler()
-
+        handler.assignment_manager.clear()
         declared_block = Block("var a string")
         block = Block("fmt.Println(a)")
 
-        handler._blocks.append(declared_block)
-        handler._blocks.append(block)
-        handler.add_declared("a", declared_block)
-        handler.assignment_manager.add_assigned("a", handler.handler_type)
-
-        result = handler.need_compile(block)
+        handler.add(declared_block)
+        handler.add(block)
 
-        self.assertTrue(result)
+        self.assertEqual(handler.blocks, [declared_block, block])
 
-    def test_is_used_assignment_need_compile_would_return_true(self):
+    def test_earlier_use_of_assignment_should_be_executed_again(self):
         handler = CodeHandler()
-
+        handler.assignment_manager.clear()
         declared_block = Block("a := 1")
         block = Block("a.get()")
+        handler.add(declared_block)
+        handler.add(block)
+
+        handler.add(Block("fmt.Println(a)"))
+
+        self.assertEqual(handler.blocks[:2], [declared_block, block])
+
+    def test_execute_blocks_follow_dependency_chain(self):
+        handler = CodeHandler()
+        handler.assignment_manager.clear()
+        handler.add(Block("a := 1"))
+        handler.add(Block("x := 5"))
+        handler.add(Block("b := a + 1"))
+        handler.add(Block("fmt.Println(b)"))
+
+        codes = [block.get_codes()[0] for block in handler.blocks]
+
+        self.assertEqual(codes, ["a := 1", "b := a + 1", "fmt.Println(b)"])
+
+    def test_long_dependency_chain_should_not_hit_recursion_limit(self):
+        handler = CodeHandler()
+        handler.assignment_manager.clear()
+        handler.add(Block("v0 := 0"))
+        for i in range(1, 3000):
+            handler.add(Block("v{0} := v{1} + 1".format(i, i - 1)))
+        handler.add(Block("fmt.Println(v2999)"))
+
+        self.assertEqual(len(handler.blocks), 3001)
 
-        handler._blocks.append(declared_block)
-        handler._blocks.append(block)
-        handler.add_declared("a", declared_block)
+    def test_rollback_should_restore_previous_declaration(self):
+        handler = CodeHandler()
+        first = Block("a := 1")
+        handler.add(first)
+        handler.add(Block('a := "x"'))
+
+        handler.rollback()
+
+        self.assertTrue(handler.get_declared()["a"] is first)
+        self.assertEqual(handler._users["a"], [0])
+
+    def test_restore_should_index_history_without_running_it(self):
+        handler = CodeHandler()
+        handler.assignment_manager.clear()
+        handler.restore([Block("a := 1"), Block("a++"), Block("b := a")])
+        handler.add(Block("fmt.Println(b)"))
 
-        result = handler.need_compile(block)
+        codes = [block.get_codes()[0] for block in handler.blocks]
 
-        self.assertTrue(result)
+        self.assertEqual(codes, ["a := 1", "a++", "b := a", "fmt.Println(b)"])
+        self.assertEqual(len(handler.history), 4)
 
     def test_parse_right_codes_when_give_a_simple_block(self):
         handler = CodeHandler()
@@ -0,0 +1,41 @@
+# coding: utf8
+
+import unittest
+
+from gonsole.block.lexer import tokenize
+
+
+class TestLexer(unittest.TestCase):
+
+    def test_should_keep_selector_chain_as_one_token(self):
+        self.assertEqual(list(tokenize("a.b.c + d")), ["a.b.c", "d"])
+
+    def test_should_skip_string_and_rune_literals(self):
+        result = list(tokenize('f("x.y", \'z\', `raw x`) + g'))
+
+        self.assertEqual(result, ["f", "g"])
+
+    def test_should_skip_escaped_quote_in_string(self):
+        self.assertEqual(list(tokenize(r'f("a\"b") + c')), ["f", "c"])
+
+    def test_should_skip_comments(self):
+        result = list(tokenize("a // b c\n/* d\ne */ f"))
+
+        self.assertEqual(result, ["a", "f"])
+
+    def test_should_skip_numbers(self):
+        result = list(tokenize("x := 0x1F + 1.5e-3 + 1_000 + .5 + y"))
+
+        self.assertEqual(result, ["x", "y"])
+
+    def test_should_skip_field_selected_from_expression(self):
+        result = list(tokenize("console.Find().get() + a[i].b"))
+
+        self.assertEqual(result, ["console.Find", "a", "i"])
+
+    def test_should_support_unicode_identifier(self):
+        self.assertEqual(list(tokenize("π := 3")), ["π"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+# coding: utf8
+
+import os
+import json
+import tempfile
+import unittest
+
+from gonsole.metrics import Histogram
+from gonsole.metrics import Metrics
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_should_get_percentiles(self):
+        histogram = Histogram()
+        for value in range(1, 101):
+            histogram.add(value)
+
+        self.assertEqual(histogram.percentile(50), 50)
+        self.assertEqual(histogram.percentile(95), 95)
+        self.assertEqual(histogram.max, 100)
+
+    def test_should_keep_max_and_count_beyond_sample_window(self):
+        histogram = Histogram(max_samples=10)
+        for value in range(100, 0, -1):
+            histogram.add(value)
+
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.max, 100)
+        self.assertEqual(histogram.percentile(100), 10)
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_should_record_stage_timing(self):
+        metrics = Metrics()
+
+        with metrics.timer("compile"):
+            pass
+
+        self.assertEqual(metrics.histograms["compile"].count, 1)
+        self.assertTrue("compile" in metrics.summary())
+
+    def test_should_append_line_to_log_file(self):
+        log_path = os.path.join(tempfile.mkdtemp(), "stats.log")
+        metrics = Metrics(log_path)
+
+        with metrics.line("fmt.Println(1)"):
+            metrics.record("run", 2.0)
+        with metrics.line("a := 1"):
+            pass
+
+        with open(log_path) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0]["line"], "fmt.Println(1)")
+        self.assertEqual(lines[0]["run"], 2.0)
+        self.assertTrue("total" in lines[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
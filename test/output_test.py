@@ -0,0 +1,49 @@
+# coding: utf8
+
+import unittest
+
+from gonsole.output import OutputLimiter
+
+
+class TestOutputLimiter(unittest.TestCase):
+
+    def write_lines(self, limiter, count):
+        for i in range(count):
+            limiter.write("{0}\n".format(i).encode("utf8"))
+        limiter.close()
+
+    def test_should_keep_all_lines_under_limit(self):
+        limiter = OutputLimiter(head=3, tail=2)
+
+        self.write_lines(limiter, 5)
+
+        self.assertEqual(limiter.getvalue(), b"0\n1\n2\n3\n4\n")
+
+    def test_should_keep_head_and_tail_when_over_limit(self):
+        limiter = OutputLimiter(head=2, tail=2)
+
+        self.write_lines(limiter, 10)
+
+        self.assertEqual(
+            limiter.getvalue(),
+            b"0\n1\n... 6 lines truncated ...\n8\n9\n"
+        )
+
+    def test_should_emit_head_lines_as_they_arrive(self):
+        emitted = []
+        limiter = OutputLimiter(emitted.append, head=2, tail=0)
+
+        limiter.write(b"a\n")
+        self.assertEqual(emitted, [b"a\n"])
+        limiter.write(b"b\n")
+        limiter.write(b"c\n")
+        limiter.close()
+
+        self.assertEqual(
+            emitted, [b"a\n", b"b\n", b"... 1 lines truncated ...\n"]
+        )
+        self.assertEqual(limiter.getvalue(), b"")
+
+
+if __name__ == '__main__':
+    unittest.main()
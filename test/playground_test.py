@@ -0,0 +1,122 @@
+# coding: utf8
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from gonsole.exceptions import PlaygroundError
+from gonsole.playground import PlaygroundClient
+
+
+class StandInPlayground(HTTPServer):
+    """Answers POST /share like play.golang.org, on a local port."""
+
+    def __init__(self):
+        HTTPServer.__init__(self, ("127.0.0.1", 0), StandInHandler)
+        self.shared = list()
+        self.failures = 0
+        self.delay = 0
+        self.thread = threading.Thread(
+            target=self.serve_forever, args=(0.05,), daemon=True
+        )
+        self.thread.start()
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:{0}".format(self.server_port)
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        server = self.server
+        time.sleep(server.delay)
+        if self.path != "/share":
+            self.send_response(404)
+            self.end_headers()
+            return
+        if server.failures:
+            server.failures -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        server.shared.append(body.decode("utf8"))
+        share_id = "id{0}".format(len(server.shared)).encode("utf8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(share_id)))
+        self.end_headers()
+        self.wfile.write(share_id)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPlaygroundClient(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInPlayground()
+        self.directory = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.directory, "playground.json")
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def client(self, **kwargs):
+        client = PlaygroundClient(
+            self.server.url, cache_path=self.cache_path, **kwargs
+        )
+        client.RETRY_DELAY = 0
+        self.addCleanup(client.close)
+        return client
+
+    def test_share_should_return_link_to_shared_code(self):
+        link = self.client().share("package main")
+
+        self.assertEqual(link, self.server.url + "/p/id1")
+        self.assertEqual(self.server.shared, ["package main"])
+
+    def test_share_unchanged_code_again_should_not_upload(self):
+        self.client().share("package main")
+
+        link = self.client().share("package main")
+        self.client().share("package main // changed")
+
+        self.assertEqual(link, self.server.url + "/p/id1")
+        self.assertEqual(len(self.server.shared), 2)
+
+    def test_should_retry_server_errors(self):
+        self.server.failures = 2
+
+        link = self.client(retries=2).share("package main")
+
+        self.assertEqual(link, self.server.url + "/p/id1")
+
+    def test_should_give_up_after_retries(self):
+        self.server.failures = 3
+
+        self.assertRaises(
+            PlaygroundError, self.client(retries=2).share, "package main"
+        )
+        self.assertEqual(self.server.failures, 0)
+
+    def test_should_time_out_slow_server(self):
+        self.server.delay = 0.5
+
+        self.assertRaises(
+            PlaygroundError,
+            self.client(timeout=0.1, retries=0).share, "package main"
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# coding: utf8
+
+import threading
+import unittest
+
+from gonsole.pool import CompilePool
+from gonsole.const import PRIORITY_BATCH, PRIORITY_INTERACTIVE
+
+
+class TestCompilePool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = CompilePool(workers=1)
+        self.release = threading.Event()
+        self.order = list()
+
+    def tearDown(self):
+        self.release.set()
+        self.pool.shutdown()
+
+    def job(self, name):
+        self.order.append(name)
+        return name
+
+    def block_worker(self):
+        return self.pool.submit("blocker", self.release.wait, (5,))
+
+    def test_interactive_build_should_run_before_queued_batch(self):
+        self.block_worker()
+        batch = self.pool.submit("b", self.job, ("batch",), PRIORITY_BATCH)
+        line = self.pool.submit(
+            "i", self.job, ("interactive",), PRIORITY_INTERACTIVE
+        )
+        self.release.set()
+
+        batch.result(5)
+        line.result(5)
+
+        self.assertEqual(self.order, ["interactive", "batch"])
+
+    def test_same_key_in_flight_should_build_once(self):
+        self.block_worker()
+        first = self.pool.submit("k", self.job, ("first",))
+        second = self.pool.submit("k", self.job, ("second",))
+        self.release.set()
+
+        self.assertIs(first, second)
+        self.assertEqual(second.result(5), "first")
+        self.assertEqual(self.order, ["first"])
+        self.assertEqual(self.pool.deduplicated, 1)
+
+    def test_should_build_again_once_finished(self):
+        self.pool.submit("k", self.job, ("first",)).result(5)
+        self.pool.submit("k", self.job, ("second",)).result(5)
+
+        self.assertEqual(self.order, ["first", "second"])
+
+    def test_should_pass_build_error_to_caller(self):
+        future = self.pool.submit("k", int, ("x",))
+
+        self.assertRaises(ValueError, future.result, 5)
+        self.assertEqual(self.pool.status()["running"], 0)
+
+    def test_should_measure_queue_depth_and_wait(self):
+        self.block_worker()
+        waiting = self.pool.submit("k", self.job, ("first",))
+        self.release.set()
+        waiting.result(5)
+
+        status = self.pool.status()
+        self.assertEqual(self.pool.metrics.histograms["queue.depth"].max, 1)
+        self.assertEqual(self.pool.metrics.histograms["queue.wait"].count, 2)
+        self.assertEqual(status["queued"], 0)
+        self.assertEqual(status["workers"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+# coding: utf8
+
+import time
+import asyncio
+import unittest
+
+from gonsole.output import OutputLimiter
+from gonsole.process import run_process
+
+
+class TestRunProcess(unittest.TestCase):
+
+    def test_should_collect_output_and_resource_usage(self):
+        result = asyncio.run(run_process(["sh", "-c", "echo out; echo err >&2"]))
+
+        self.assertEqual(result.out, b"out\n")
+        self.assertEqual(result.err, b"err\n")
+        self.assertEqual(result.returncode, 0)
+        self.assertTrue(result.rusage.ru_maxrss > 0)
+
+    def test_should_bound_stderr_when_given_a_limiter(self):
+        result = asyncio.run(run_process(
+            ["sh", "-c", "for i in 1 2 3 4 5 6; do echo $i >&2; done"],
+            stderr=OutputLimiter(None, head=2, tail=1)
+        ))
+
+        self.assertEqual(result.err, b"1\n2\n... 3 lines truncated ...\n6\n")
+
+    def test_should_kill_process_group_when_timed_out(self):
+        start = time.time()
+
+        result = asyncio.run(
+            run_process(["sh", "-c", "sleep 30 & sleep 30"], timeout=0.2)
+        )
+
+        self.assertTrue(time.time() - start < 10)
+        self.assertTrue(b"timed out" in result.err)
+        self.assertNotEqual(result.returncode, 0)
+
+    def test_should_kill_process_when_cancelled(self):
+        async def cancel_later():
+            task = asyncio.ensure_future(run_process(["sleep", "30"]))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            await task
+
+        start = time.time()
+
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(cancel_later())
+        self.assertTrue(time.time() - start < 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+# coding: utf8
+
+import unittest
+
+from gonsole.const import GO_TEMPLATE
+from gonsole.render import Template
+
+
+class TestTemplate(unittest.TestCase):
+
+    def test_should_find_slots_of_go_template(self):
+        template = Template(GO_TEMPLATE)
+
+        self.assertEqual(
+            template.slots,
+            ["{%import_area%}", "{%func_area%}", "{%code_area%}"]
+        )
+
+    def test_render_should_fill_slots_and_keep_literals(self):
+        template = Template("a{%x%}b{%y%}c")
+
+        self.assertEqual(template.render({"{%x%}": "1", "{%y%}": "2"}), "a1b2c")
+
+    def test_render_should_leave_missing_slot_empty(self):
+        template = Template("a{%x%}b")
+
+        self.assertEqual(template.render({}), "ab")
+
+    def test_render_should_not_expand_slot_inside_section(self):
+        template = Template("{%x%}|{%y%}")
+
+        result = template.render({"{%x%}": "{%y%}", "{%y%}": "2"})
+
+        self.assertEqual(result, "{%y%}|2")
+
+
+if __name__ == '__main__':
+    unittest.main()
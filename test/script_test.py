@@ -0,0 +1,107 @@
+# coding: utf8
+
+import unittest
+from unittest import mock
+
+from gonsole.block import Block
+from gonsole.console import Console
+from gonsole.const import SCRIPT_SENTINEL
+from gonsole.script import ScriptRunner
+from gonsole.stdlib import StdlibIndex
+
+
+def joined(*chunks):
+    return "".join(chunk + SCRIPT_SENTINEL for chunk in chunks).encode("utf8")
+
+
+class TestScriptRunner(unittest.TestCase):
+
+    def setUp(self):
+        # nothing to import, go list is never run
+        patcher = mock.patch.object(StdlibIndex, "instance", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.console = Console()
+        self.console.assignment_manager.clear()
+        self.console.assignment_manager.clear_declared()
+        self.console.packages._add_default_packages()
+        self.console.output = mock.MagicMock()
+        self.console.process = mock.MagicMock(return_value="from repl")
+        self.console.run_source = mock.MagicMock()
+        self.runner = ScriptRunner(self.console)
+
+    def tearDown(self):
+        self.console.close()
+
+    def outputs(self):
+        return [c[0][0] for c in self.console.output.call_args_list]
+
+    def test_should_compile_lines_once_and_split_output(self):
+        self.console.run_source.return_value = (
+            joined("", "6\n", "46\n"), joined("", "", "")
+        )
+
+        self.runner.run(["a := 3", "fmt.Println(a * 2)", "46"])
+
+        self.assertEqual(self.runner.compiles, 1)
+        self.assertEqual(self.outputs(), ["6", "46"])
+        self.console.process.assert_not_called()
+        self.assertEqual(len(self.console.codes._blocks), 2)
+
+    def test_should_run_line_failed_to_compile_on_its_own(self):
+        def run_source(source, timeout=None):
+            if "undefinedThing" in source:
+                line = source.split("\n").index("    b := undefinedThing")
+                error = "./main.go:{0}:10: undefined: undefinedThing\n"
+                return b"", error.format(line + 1).encode("utf8")
+            return joined("", "3\n"), joined("", "")
+        self.console.run_source.side_effect = run_source
+
+        self.runner.run(["a := 3", "b := undefinedThing", "fmt.Println(a)"])
+
+        self.assertEqual(self.runner.compiles, 2)
+        self.assertEqual(self.outputs(), ["from repl", "3"])
+        self.assertEqual(
+            self.console.process.call_args[0][0].codes,
+            ["b := undefinedThing"]
+        )
+
+    def test_should_run_again_after_the_line_failed_at_runtime(self):
+        self.console.run_source.side_effect = [
+            (joined("1\n"), joined("") + b"panic: boom\n"),
+            (joined("1\n", "3\n"), joined("", "")),
+        ]
+
+        self.runner.run([
+            "fmt.Println(1)", "panic(\"boom\")", "fmt.Println(3)"
+        ])
+
+        self.assertEqual(self.outputs(), ["1", "from repl", "3"])
+        self.assertNotIn("boom", self.console.run_source.call_args[0][0])
+
+    def test_should_give_up_batch_when_error_is_not_in_a_line(self):
+        self.console.run_source.return_value = (
+            b"", b"./main.go:1:1: expected 'package'\n"
+        )
+
+        self.runner.run(["fmt.Println(1)", "fmt.Println(2)"])
+
+        self.assertEqual(self.runner.compiles, 1)
+        self.assertEqual(self.console.process.call_count, 2)
+
+    def test_redeclaration_should_open_nested_scope(self):
+        body, owners = self.runner._body(
+            [Block("a := 1"), Block("a := \"x\""), Block("fmt.Println(a)")]
+        )
+
+        lines = body.split("\n")
+        self.assertEqual(lines[0], "    a := 1")
+        self.assertEqual(lines[1], "    _ = a")
+        self.assertEqual(lines[3], "    {")
+        self.assertEqual(lines[4], "        a := \"x\"")
+        self.assertEqual(lines[-1], "    }")
+        self.assertEqual(owners[5], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
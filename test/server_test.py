@@ -0,0 +1,160 @@
+# coding: utf8
+
+import json
+import asyncio
+import unittest
+from unittest import mock
+
+from tornado.testing import AsyncHTTPTestCase, gen_test
+from tornado.websocket import websocket_connect
+
+from gonsole.console import Console
+from gonsole.exceptions import ServerBusyError
+from gonsole.server import SessionManager, create_console, make_app
+
+
+def fake_execute(console, source, rollback=True):
+    return "ran {0} blocks".format(len(console.codes.blocks))
+
+
+@mock.patch.object(Console, "execute", fake_execute)
+class TestServer(AsyncHTTPTestCase):
+
+    def setUp(self):
+        self.manager = SessionManager(max_sessions=2, max_compiles=1)
+        super(TestServer, self).setUp()
+
+    def tearDown(self):
+        super(TestServer, self).tearDown()
+        self.manager.shutdown()
+
+    def get_app(self):
+        return make_app(self.manager)
+
+    def post(self, path, body=None):
+        response = self.fetch(
+            path, method="POST", body=json.dumps(body or {}),
+            raise_error=False
+        )
+        return response.code, json.loads(response.body or "null")
+
+    def test_sessions_should_keep_separate_state(self):
+        _, first = self.post("/sessions")
+        _, second = self.post("/sessions")
+
+        self.post("/sessions/{0}/run".format(first["session"]),
+                  {"code": "a := 1"})
+        _, first_output = self.post(
+            "/sessions/{0}/run".format(first["session"]),
+            {"code": "fmt.Println(a)"}
+        )
+        _, second_output = self.post(
+            "/sessions/{0}/run".format(second["session"]),
+            {"code": "fmt.Println(a)"}
+        )
+
+        self.assertEqual(first_output, {"output": "ran 2 blocks"})
+        self.assertEqual(second_output, {"output": "ran 1 blocks"})
+
+    def test_should_refuse_sessions_past_the_limit(self):
+        self.post("/sessions")
+        self.post("/sessions")
+
+        code, body = self.post("/sessions")
+
+        self.assertEqual(code, 503)
+        self.assertEqual(body, {"error": "too many sessions"})
+
+    def test_should_refuse_export_and_unknown_session(self):
+        _, session = self.post("/sessions")
+
+        _, output = self.post(
+            "/sessions/{0}/run".format(session["session"]),
+            {"code": "export /etc/passwd"}
+        )
+        code, _ = self.post("/sessions/nosuch/run", {"code": "1"})
+
+        _, load = self.post(
+            "/sessions/{0}/run".format(session["session"]),
+            {"code": "load /etc/passwd"}
+        )
+
+        self.assertEqual(output, {"output": "export: not available"})
+        self.assertEqual(load, {"output": "load: not available"})
+        self.assertEqual(code, 404)
+
+    def test_delete_should_close_session(self):
+        _, session = self.post("/sessions")
+
+        response = self.fetch(
+            "/sessions/{0}".format(session["session"]), method="DELETE"
+        )
+
+        self.assertEqual(response.code, 204)
+        self.assertEqual(self.manager.sessions, {})
+
+    @gen_test
+    def test_websocket_should_run_lines_in_its_session(self):
+        connection = yield websocket_connect(
+            "ws://127.0.0.1:{0}/ws".format(self.get_http_port())
+        )
+        hello = json.loads((yield connection.read_message()))
+        connection.write_message("a := 1\nfmt.Println(a)")
+        reply = json.loads((yield connection.read_message()))
+
+        self.assertIn(hello["session"], self.manager.sessions)
+        self.assertEqual(reply, {"output": "ran 0 blocks\nran 2 blocks"})
+        connection.close()
+
+
+class TestSessionManager(unittest.TestCase):
+
+    def setUp(self):
+        self.console = mock.MagicMock()
+        self.manager = SessionManager(
+            lambda: self.console, max_compiles=1, max_queue=1, idle_timeout=60
+        )
+
+    def tearDown(self):
+        self.manager.shutdown()
+
+    def test_should_evict_idle_sessions_only(self):
+        idle = self.manager.create()
+        active = self.manager.create()
+        idle.last_used -= 61
+
+        self.manager.evict_idle()
+
+        self.assertEqual(list(self.manager.sessions), [active.id])
+        self.console.close.assert_called_once_with()
+
+    def test_should_queue_lines_up_to_limit(self):
+        self.manager.max_sessions = 3
+        sessions = [self.manager.create() for _ in range(3)]
+        self.manager._run = mock.MagicMock(return_value="")
+
+        async def run_all():
+            runs = [
+                asyncio.ensure_future(self.manager.run(session, "1"))
+                for session in sessions
+            ]
+            return await asyncio.gather(*runs, return_exceptions=True)
+
+        results = asyncio.run(run_all())
+
+        self.assertEqual(results[:2], ["", ""])
+        self.assertTrue(isinstance(results[2], ServerBusyError))
+
+    def test_create_console_should_not_share_names(self):
+        first = create_console()
+        second = create_console()
+
+        first.packages.add("strings")
+
+        self.assertNotIn("strings", second.packages.get_declared())
+        first.close()
+        second.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
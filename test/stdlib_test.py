@@ -0,0 +1,79 @@
+# coding: utf8
+
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from gonsole.stdlib import StdlibIndex
+from gonsole.exceptions import UnknownPackageError
+
+STRINGS_DOC = """func ToUpper(s string) string
+type Builder struct{ ... }
+type Reader struct{ ... }
+    func NewReader(s string) *Reader
+func (b *Builder) String() string
+"""
+
+
+class TestStdlibIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.toolchain = mock.MagicMock(fingerprint="go-test")
+        self.toolchain.list_std.return_value = [
+            ("strings", "strings"), ("math/rand", "rand"),
+            ("crypto/rand", "rand"),
+        ]
+        self.toolchain.doc.side_effect = lambda path: {
+            "strings": STRINGS_DOC,
+            "math/rand": "func Intn(n int) int\n",
+            "crypto/rand": "var Reader io.Reader\n",
+        }[path]
+        self.index = StdlibIndex(self.toolchain, root=self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_should_list_packages_once_per_toolchain(self):
+        self.index.exports("strings")
+
+        index = StdlibIndex(self.toolchain, root=self.root)
+
+        self.assertTrue("strings" in index)
+        self.assertEqual(index.exports("strings")[0], "Builder")
+        self.assertEqual(self.toolchain.list_std.call_count, 1)
+        self.assertEqual(self.toolchain.doc.call_count, 1)
+
+    def test_exports_should_include_constructors_but_not_methods(self):
+        self.assertEqual(
+            self.index.exports("strings"),
+            ["Builder", "NewReader", "Reader", "ToUpper"]
+        )
+
+    def test_resolve_should_pick_package_exporting_member(self):
+        self.assertEqual(self.index.resolve("rand", "Intn"), "math/rand")
+        self.assertEqual(self.index.resolve("rand", "Reader"), "crypto/rand")
+        self.assertIsNone(self.index.resolve("rand", "Perm"))
+        self.assertEqual(self.index.resolve("strings", "X"), "strings")
+        self.toolchain.doc.assert_any_call("math/rand")
+
+    def test_check_should_suggest_close_matches(self):
+        with self.assertRaises(UnknownPackageError) as context:
+            self.index.check("math/rnd")
+
+        self.assertEqual(
+            str(context.exception),
+            'package math/rnd is not in std, did you mean "math/rand"?'
+        )
+
+    def test_check_should_accept_everything_without_go(self):
+        self.toolchain.list_std.side_effect = OSError("no go")
+
+        self.index.check("strngs")
+
+        self.assertFalse(self.index.available)
+
+
+if __name__ == '__main__':
+    unittest.main()
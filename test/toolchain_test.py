@@ -0,0 +1,74 @@
+# coding: utf8
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from gonsole.const import GO_TEMPLATE
+from gonsole.toolchain import Toolchain
+from gonsole.toolchain import DirectBuilder
+
+
+class TestToolchain(unittest.TestCase):
+
+    @mock.patch("subprocess.Popen")
+    def test_compile_packages_should_not_link(self, mock_popen):
+        mock_popen.return_value.communicate.return_value = (b"", None)
+        mock_popen.return_value.returncode = 0
+
+        Toolchain("go").compile_packages(["runtime", "fmt"])
+
+        self.assertEqual(
+            mock_popen.call_args[0][0], ["go", "build", "runtime", "fmt"]
+        )
+
+
+class TestDirectBuilder(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.toolchain = mock.MagicMock(fingerprint="0" * 64)
+        self.builder = DirectBuilder(self.toolchain, root=self.root)
+        self.source_path = os.path.join(self.root, "main.go")
+        with open(self.source_path, "w") as f:
+            f.write(GO_TEMPLATE.replace(
+                "{%import_area%}", '    "fmt"\n    "strings"'
+            ))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_should_get_imports_from_template(self):
+        with open(self.source_path) as f:
+            imports = self.builder._imports(f.read())
+
+        self.assertEqual(imports, ["fmt", "strings"])
+
+    def test_fallback_to_go_build_when_importcfg_unavailable(self):
+        self.builder.importcfg = mock.MagicMock(return_value=None)
+
+        self.builder.build(self.source_path, "main", {"GOTMPDIR": "/go"})
+
+        self.toolchain.build.assert_called_once_with(
+            self.source_path, "main", {"GOTMPDIR": "/go"}
+        )
+
+    def test_reuse_importcfg_when_it_is_still_valid(self):
+        package_file = os.path.join(self.root, "fmt.a")
+        open(package_file, "w").close()
+        importcfg = self.builder._importcfg_path(["fmt"])
+        os.makedirs(os.path.dirname(importcfg))
+        with open(importcfg, "w") as f:
+            f.write("packagefile fmt=" + package_file + "\n")
+
+        with mock.patch("subprocess.Popen") as mock_popen:
+            result = self.builder.importcfg(["fmt"])
+
+        self.assertEqual(result, importcfg)
+        self.assertFalse(mock_popen.called)
+
+
+if __name__ == '__main__':
+    unittest.main()
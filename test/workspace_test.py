@@ -0,0 +1,38 @@
+# coding: utf8
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from gonsole.workspace import Workspace
+
+
+class TestWorkspace(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_workspace_should_write_nothing_by_itself(self):
+        Workspace(self.root)
+
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_go_env_should_not_override_user_settings(self):
+        workspace = Workspace(self.root)
+
+        with mock.patch.dict(os.environ, {"GOCACHE": "/somewhere"}):
+            env = workspace.go_env()
+
+        self.assertEqual(
+            env, {"GOTMPDIR": os.path.join(self.root, "gonsole-gotmp")}
+        )
+        self.assertTrue(os.path.isdir(env["GOTMPDIR"]))
+
+
+if __name__ == '__main__':
+    unittest.main()